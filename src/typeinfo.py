@@ -13,13 +13,38 @@
 import functools
 from inspect import isclass, ismethod, isfunction
 from copy import deepcopy
-from types import MethodType
+from types import MethodType, MemberDescriptorType, InstanceType
 from inspect import isclass, isfunction
 import functools
 from copy import deepcopy
+import abc
+import collections
+import csv
+import hashlib
+import importlib
+import json
+import keyword
+import marshal
+import mmap
+import operator
+import os
+import re
+import struct
+import threading
+import time
+import timeit
+import weakref
 
 DEBUG_MODE = False
 
+# number of live objects interned per class, for classes with __typeinfo_intern__ = True
+INTERN_CAPACITY = 10000
+
+# defer normalizing and validating TypeInfo members to the first use of a class, for fast imports (see warmup)
+LAZY_TYPEINFO = False
+
+_MISSING = object()
+
 
 class MemberTypeInfo(object):
     """ Contains the type info of members. Things like:
@@ -63,33 +88,91 @@ class MemberTypeInfo(object):
                 return False
 
         if val is not None:
-            tps = (self.type,) if isclass(self.type) else self.type
-            for t in tps:
-                if isinstance(val,t):
-                    return True
+            if self.acceptsValue(val):
+                return True
             if throw:
                 raise TypeError("Memeber '%s' is not derived from '%s'." % (self.name,self.type))
             else:
                 return False
 
 
+    _acceptCache = None
+
+    def acceptsValue(self, val):
+        """ True if the (non None) val is an instance of the member type. For members typed with ABCs, where
+            isinstance is slow, results are cached per concrete type of val (see _AcceptCache).
+        """
+        cache = self._acceptCache
+        if cache is None or cache.type is not self.type:
+            cache = self._acceptCache = _AcceptCache(self.type)
+        if not cache.cacheable:
+            return isinstance(val, cache.types)
+        cls = type(val)
+        if cls is InstanceType or val.__class__ is not cls:
+            # old style instances and proxies faking their __class__, isinstance doesn't go by type(val)
+            return isinstance(val, cache.types)
+        if cache.token != _abcCacheToken():
+            cache.clear()
+        try:
+            return cache.results[cls]
+        except KeyError:
+            pass
+        ok = isinstance(val, cache.types)
+        cache.store(cls, ok)
+        return ok
+
+    def sortKey(self):
+        """ the key members are ordered by: members with an order first (by order), then by name """
+        return (self.order is None, self.order, self.name)
+
     def __cmp__(self, other):
         if not isinstance(other,MemberTypeInfo):
             raise Exception("Can't compare a MemberTypeInfo to %s",other)
+        return cmp(self.sortKey(), other.sortKey())
 
-        if self.order is not None:
-            if other.order is None:
-                return -1; # things with order come before other stuff
-            i = cmp(self.order,other.order)
-            if i !=0:
-                return i;
-            return cmp(self.name,other.name)
 
-        if other.order is not None:
-            return 1 # things with order come before other stuff
 
-        return cmp(self.name,other.name)
+_ACCEPT_CACHE_SIZE = 256
 
+# changes whenever a class is registered with an ABC, which can change isinstance results
+if hasattr(abc, "get_cache_token"):
+    _abcCacheToken = abc.get_cache_token
+else:
+    def _abcCacheToken():
+        return abc.ABCMeta._abc_invalidation_counter
+
+class _AcceptCache(object):
+    """ remembers which concrete types MemberTypeInfo.acceptsValue accepted, for one member type. Classes are
+        weakly referenced and the cache is emptied when it grows beyond _ACCEPT_CACHE_SIZE or an ABC
+        registration happens. Only member types including an ABC are cached, a plain isinstance is cheaper
+        than the lookup. Types with another custom __instancecheck__ are never cached, their answer may
+        depend on more than the type.
+    """
+
+    def __init__(self, tp):
+        self.type = tp
+        self.types = _typeTuple(tp)
+        self.token = _abcCacheToken()
+        self.results = weakref.WeakKeyDictionary()
+        self.cacheable = False
+        for t in self.types:
+            if isinstance(t, abc.ABCMeta):
+                self.cacheable = True
+        for t in self.types:
+            check = getattr(type(t), "__instancecheck__", None)
+            if check is not None and type(t) is not abc.ABCMeta and check != type.__instancecheck__:
+                self.cacheable = False
+
+    def clear(self):
+        self.results.clear()
+        self.token = _abcCacheToken()
+
+    def store(self, cls, ok):
+        if not self.cacheable:
+            return
+        if len(self.results) >= _ACCEPT_CACHE_SIZE:
+            self.results.clear()
+        self.results[cls] = ok
 
 
 class TypeInfo(object):
@@ -100,8 +183,31 @@ class TypeInfo(object):
                 - MemberTypeInfo instance
 
           **kwargs can be use to specify things in a more python like style
+
+          With LAZY_TYPEINFO set the members are only normalized and validated on first use (see warmup)
         """
-        self._memberInfo = {}
+        self._members = None
+        self._pending = (asList, kwargs)
+        if LAZY_TYPEINFO:
+            _pendingTypeInfos.add(self)
+        else:
+            self._resolve()
+
+    @property
+    def _memberInfo(self):
+        if self._members is None:
+            self._resolve()
+        return self._members
+
+    @_memberInfo.setter
+    def _memberInfo(self, value):
+        self._members = value
+        self._pending = None
+        _pendingTypeInfos.discard(self)
+
+    def _resolve(self):
+        asList, kwargs = self._pending
+        memberInfo = {}
 
         def normalizeMti(mti):
             if isinstance(mti,tuple) or isinstance(mti,list):
@@ -125,7 +231,7 @@ class TypeInfo(object):
 
             mti.validateSettings()
             if mti.order is None: mti.order=i
-            self._memberInfo[mti.name]=mti
+            memberInfo[mti.name]=mti
 
         for name,value in kwargs.iteritems():
 
@@ -134,11 +240,81 @@ class TypeInfo(object):
                 raise TypeError("TypeInfo - failed to initialize MemberTypeInfo for %s" % name)
             value.name=name
             value.validateSettings()
-            self._memberInfo[value.name]=value
+            memberInfo[value.name]=value
+
+        self._memberInfo = memberInfo
 
 
+_pendingTypeInfos = weakref.WeakSet()
 
+# (schema fingerprint, function name) -> (md5 of the generated source, code object), see load_schema_cache
+_codeCache = {}
+# the functions generated for every schema, besides the validator
+_GENERATED_FUNCTIONS = ("initMembers", "setToDefaults", "construct", "toDict", "toTuple", "fromDict", "fromTuple",
+                        "eq", "hash", "copy", "deepcopy")
+_SCHEMA_CACHE_FORMAT = 1
 
+def _pythonMagic():
+    try:
+        from importlib.util import MAGIC_NUMBER
+        return MAGIC_NUMBER
+    except ImportError:
+        import imp
+        return imp.get_magic()
+
+def save_schema_cache(path, classes=None):
+    """ generates all the specialized code of classes (by default all TypedObject classes) and writes the
+        compiled code to path, keyed by the fingerprint of the class schemas. Classes are not switched to
+        compiled validation by this.
+    """
+    entries = {}
+    for cls in (list(_typedClasses) if classes is None else classes):
+        schema = _resolveSchema(cls)
+        _generateValidator(schema)
+        for name in _GENERATED_FUNCTIONS:
+            getattr(schema, name)
+        for name, entry in schema.generatedCode.iteritems():
+            entries[(schema.fingerprint, name)] = entry
+    data = marshal.dumps((_SCHEMA_CACHE_FORMAT, _pythonMagic(), entries))
+    tmp = "%s.%d.tmp" % (path, os.getpid())
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.rename(tmp, path) # readers never see half written files
+
+def load_schema_cache(path):
+    """ loads code written by save_schema_cache, code generation then skips compiling whatever it finds there.
+        Entries only match a class with the same fingerprint and identical generated source, so changed
+        definitions just compile again. Returns False (and loads nothing) if the file is missing, unreadable
+        or from another python version.
+    """
+    try:
+        with open(path, "rb") as f:
+            fmt, magic, entries = marshal.loads(f.read())
+    except (IOError, OSError, EOFError, ValueError, TypeError):
+        return False
+    if fmt != _SCHEMA_CACHE_FORMAT or magic != _pythonMagic():
+        return False
+    _codeCache.update(entries)
+    return True
+
+def warmup(classes=None):
+    """ normalizes and validates all TypeInfos left pending by LAZY_TYPEINFO and resolves the schema of classes
+        (by default all TypedObject classes). Meant for startup or a CI check: raises a TypeError listing every
+        problem found.
+    """
+    errors = []
+    for ti in list(_pendingTypeInfos):
+        try:
+            ti._resolve()
+        except TypeError, e:
+            errors.append(str(e))
+    for cls in (list(_typedClasses) if classes is None else classes):
+        try:
+            _resolveSchema(cls)
+        except TypeError, e:
+            errors.append("%s: %s" % (cls.__name__, e))
+    if errors:
+        raise TypeError("typeinfo warmup failed:\n  " + "\n  ".join(sorted(set(errors))))
 
 
 class class_or_instance(object):
@@ -149,19 +325,662 @@ class class_or_instance(object):
         return MethodType(self._func, cls if obj is None else obj, cls)
 
 
+_IDENTIFIER_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+def _isIdentifier(name):
+    return isinstance(name, str) and _IDENTIFIER_RE.match(name) is not None and not keyword.iskeyword(name)
+
+def _typeTuple(tp):
+    """ normalizes the type of a MemberTypeInfo to a tuple usable with isinstance """
+    return (tp,) if isclass(tp) else tuple(tp)
+
+def _hasAbc(mti):
+    for t in _typeTuple(mti.type):
+        if isinstance(t, abc.ABCMeta):
+            return True
+    return False
+
+def _attrGetter(obj, name, ns, key):
+    """ source of an expression reading member name of obj. Non identifier names go through getattr. """
+    if _isIdentifier(name):
+        return "%s.%s" % (obj, name)
+    ns[key] = name
+    return "getattr(%s, %s)" % (obj, key)
+
+def _definedBelow(cls, base, name):
+    """ True if name is overridden in cls somewhere below base """
+    for c in cls.__mro__:
+        if name in c.__dict__:
+            return c is not base
+    return False
+
+def _makeFunction(name, lines, namespace, schema):
+    """ compiles generated source lines and returns the function called name defined by them. The code is
+        taken from the schema cache (see load_schema_cache) when it has it for the same source.
+    """
+    source = "\n".join(lines) + "\n"
+    digest = hashlib.md5(source).hexdigest()
+    cached = _codeCache.get((schema.fingerprint, name))
+    if cached is not None and cached[0] == digest:
+        code = cached[1]
+    else:
+        code = compile(source, "<typeinfo generated %s>" % name, "exec")
+    schema.generatedCode[name] = (digest, code)
+    exec(code, namespace)
+    return namespace[name]
+
+
+def _generateValidator(schema):
+    """ generates a straight line equivalent of TypedObjectBase.validateMemberTypes for schema """
+    ns = {}
+    lines = ["def validate(self, throw=True):"]
+    for i, mti in enumerate(schema.memberList):
+        ns["_n%d" % i] = mti.name
+        ns["_mt%d" % i] = mti.type
+        lines.append("    val = %s" % _attrGetter("self", mti.name, ns, "_n%d" % i))
+        if _definedBelow(type(mti), MemberTypeInfo, "validateValue"):
+            # a MemberTypeInfo subclass with its own validation, can't be inlined
+            ns["_mti%d" % i] = mti
+            check = "not _mti%d.validateValue(val, throw=False)" % i
+        elif _hasAbc(mti):
+            # isinstance with ABCs is slow, go through the acceptance cache
+            ns["_acc%d" % i] = mti.acceptsValue
+            check = "not _acc%d(val)" % i
+        else:
+            ns["_t%d" % i] = _typeTuple(mti.type)
+            check = "not isinstance(val, _t%d)" % i
+        if mti.nullable:
+            lines.append("    if val is not None and %s:" % check)
+        else:
+            lines.append("    if val is None:")
+            lines.append("        raise TypeError('Member %%s of %%s is not nullable but is None' %% (_n%d, self))" % i)
+            lines.append("    elif %s:" % check)
+        lines.append("        if throw:")
+        lines.append("            raise TypeError('Member %%s of %%s is not of type %%s (found %%s of type %%s)'"
+                     " %% (_n%d, self, _mt%d, val, type(val)))" % (i, i))
+        lines.append("        return False")
+    lines.append("    return True")
+    return _makeFunction("validate", lines, ns, schema)
+
+
+_IMMUTABLE_TYPES = frozenset([type(None), bool, int, long, float, complex, str, unicode])
+
+def _isImmutable(value):
+    """ True for values deepcopy would hand back as is, so they can be shared between instances """
+    tp = type(value)
+    if tp in _IMMUTABLE_TYPES or isclass(value):
+        return True
+    if tp is tuple or tp is frozenset:
+        for v in value:
+            if not _isImmutable(v):
+                return False
+        return True
+    return False
+
+def _defaultFactory(value):
+    """ returns a cheap callable producing a fresh copy of the mutable default value """
+    tp = type(value)
+    if tp in (list, dict, set):
+        if not value:
+            return tp
+        values = value.itervalues() if tp is dict else iter(value)
+        if all(_isImmutable(v) for v in values):
+            return functools.partial(tp, value)
+    return functools.partial(deepcopy, value)
+
+def _defaultSource(mti, i, ns, noneOnInit):
+    """ source of an expression producing the initial value of mti """
+    if noneOnInit and mti.none_on_init:
+        return "None"
+    if not mti.nullable and mti.default is None:
+        ns["_f%d" % i] = mti.type
+        return "_f%d()" % i
+    if _isImmutable(mti.default):
+        ns["_d%d" % i] = mti.default
+        return "_d%d" % i
+    ns["_f%d" % i] = _defaultFactory(mti.default)
+    return "_f%d()" % i
+
+def _generateInitializer(schema, name, noneOnInit):
+    """ generates a straight line equivalent of initMembers (noneOnInit=True) or setToDefaults """
+    ns = {}
+    lines = ["def %s(self):" % name]
+    for i, mti in enumerate(schema.memberList):
+        value = _defaultSource(mti, i, ns, noneOnInit)
+        desc = _enforcedDescriptor(schema.cls, mti.name)
+        if value == "None" and not mti.nullable and desc is not None and desc.check:
+            # none_on_init members are allowed to start out invalid
+            ns["_raw%d" % i] = desc.setRaw
+            lines.append("    _raw%d(self, None)" % i)
+        else:
+            # frozen objects can only be initialized, not reset to their defaults
+            lines.append("    " + _assignSource("self", mti, i, value, ns, schema.frozen and noneOnInit))
+    lines.append("    pass")
+    return _makeFunction(name, lines, ns, schema)
+
+def _assignSource(obj, mti, i, value, ns, frozen=False):
+    """ source of a statement setting member mti (the i'th of the schema) of obj to value. Frozen objects
+        are initialized with object.__setattr__.
+    """
+    if frozen:
+        ns["_n%d" % i] = mti.name
+        ns["_set"] = object.__setattr__
+        return "_set(%s, _n%d, %s)" % (obj, i, value)
+    if _isIdentifier(mti.name):
+        return "%s.%s = %s" % (obj, mti.name, value)
+    ns["_n%d" % i] = mti.name
+    return "setattr(%s, _n%d, %s)" % (obj, i, value)
+
+def _generateConstructor(schema):
+    """ generates the body of TypedObject.__init__: initMembers followed by kwargs assignment """
+    ns = {"_names": frozenset(schema.members), "_set": object.__setattr__ if schema.frozen else setattr}
+    lines = ["def construct(self, kwargs):"]
+    if _definedBelow(schema.cls, TypedObjectBase, "initMembers"):
+        lines.append("    self.initMembers()")
+    else:
+        ns["_initMembers"] = schema.initMembers
+        lines.append("    _initMembers(self)")
+    lines += [
+        "    for k, v in kwargs.iteritems():",
+        "        if k not in _names and not hasattr(self, k):",
+        "            raise Exception('Cannot initialize attribute %s: attibute not found.' % (k,))",
+        "        _set(self, k, v)",
+    ]
+    return _makeFunction("construct", lines, ns, schema)
+
+def _generateEquality(schema):
+    """ generates eq(self, other), comparing the members in schema order. Only instances of the very same
+        class are compared, anything else is NotImplemented.
+    """
+    ns = {}
+    lines = ["def eq(self, other):",
+             "    if other is self:",
+             "        return True",
+             "    if other.__class__ is not self.__class__:",
+             "        return NotImplemented"]
+    compares = []
+    for i, mti in enumerate(schema.memberList):
+        ns["_n%d" % i] = mti.name
+        compares.append("%s == %s" % (_attrGetter("self", mti.name, ns, "_n%d" % i),
+                                      _attrGetter("other", mti.name, ns, "_n%d" % i)))
+    lines.append("    return %s" % (" and ".join(compares) or "True"))
+    return _makeFunction("eq", lines, ns, schema)
+
+def _generateHash(schema):
+    """ generates hash(self) over the members in schema order. Frozen objects keep their hash. """
+    ns = {"_cls": schema.cls, "_set": object.__setattr__, "_hash": hash}
+    values = []
+    for i, mti in enumerate(schema.memberList):
+        ns["_n%d" % i] = mti.name
+        values.append(_attrGetter("self", mti.name, ns, "_n%d" % i))
+    value = "_hash((_cls, %s))" % "".join(v + ", " for v in values)
+    if not schema.frozen:
+        return _makeFunction("hash", ["def hash(self):", "    return " + value], ns, schema)
+    lines = ["def hash(self):",
+             "    try:",
+             "        return self.__typeinfo_hash__",
+             "    except AttributeError:",
+             "        pass",
+             "    h = " + value,
+             "    _set(self, '__typeinfo_hash__', h)",
+             "    return h"]
+    return _makeFunction("hash", lines, ns, schema)
+
+# internal per instance state, never copied
+_BOOKKEEPING = frozenset(["__typeinfo_dirty__", "__typeinfo_hash__"])
+
+def _sharedOnCopy(mti):
+    """ True if the declared types of mti are all immutable, so deepcopy can share the member value """
+    for t in _typeTuple(mti.type):
+        if t not in _IMMUTABLE_TYPES:
+            return False
+    return True
+
+def _copyState(schema, obj, new, memo):
+    """ copies the untyped instance attributes and slots of obj to new, deep copying them if memo is given """
+    d = getattr(obj, "__dict__", None)
+    if d:
+        extra = dict((k, v) for k, v in d.iteritems() if k not in schema.members and k not in _BOOKKEEPING)
+        if memo is not None:
+            extra = deepcopy(extra, memo)
+        new.__dict__.update(extra)
+    for name in schema.stateSlots:
+        try:
+            val = getattr(obj, name)
+        except AttributeError:
+            continue
+        object.__setattr__(new, name, val if memo is None else deepcopy(val, memo))
+
+def _generateCopier(schema, deep):
+    """ generates copy(self) / deepcopy(self, memo) for schema. Members go straight from object to object;
+        deepcopy shares the values of members declared with immutable types and deep copies the rest
+        (typed objects through their own generated deepcopy), registering the copy in memo first so cycles
+        and shared objects come out right.
+    """
+    cls = schema.cls
+    name = "deepcopy" if deep else "copy"
+    ns = {"_cls": cls, "_deepcopy": deepcopy, "_state": functools.partial(_copyState, schema)}
+    lines = ["def %s(self%s):" % (name, ", memo" if deep else ""),
+             "    new = _cls.__new__(_cls)"]
+    if deep:
+        lines.append("    memo[id(self)] = new")
+    for i, mti in enumerate(schema.memberList):
+        # members that were never set (e.g. by a custom __init__) stay unset in the copy
+        lines += ["    try:",
+                  "        val = %s" % _attrGetter("self", mti.name, ns, "_n%d" % i),
+                  "    except AttributeError:",
+                  "        pass",
+                  "    else:"]
+        if deep and not _sharedOnCopy(mti):
+            lines += ["        if val is not None:",
+                      "            val = _deepcopy(val, memo)"]
+        elif deep:
+            # members aren't checked on assignment, only share what really is immutable
+            ns["_immutable"] = _IMMUTABLE_TYPES
+            lines += ["        if type(val) not in _immutable:",
+                      "            val = _deepcopy(val, memo)"]
+        desc = _enforcedDescriptor(cls, mti.name)
+        if desc is not None:
+            # the values are copied as they are, like the instance state of a plain copy
+            ns["_raw%d" % i] = desc.setRaw
+            lines.append("        _raw%d(new, val)" % i)
+        else:
+            lines.append("        " + _assignSource("new", mti, i, "val", ns, schema.frozen))
+    if cls.__dictoffset__ or schema.stateSlots:
+        lines.append("    _state(self, new, %s)" % ("memo" if deep else "None"))
+    lines.append("    return new")
+    return _makeFunction(name, lines, ns, schema)
+
+_PICKLE_HOOKS = ("__getstate__", "__setstate__", "__reduce__", "__reduce_ex__", "__getnewargs__")
+
+def _hasPickleHooks(cls):
+    """ True if cls customizes its pickling (and so copying) somewhere in its mro """
+    for hook in _PICKLE_HOOKS:
+        for c in cls.__mro__:
+            if hook in c.__dict__:
+                if c is not object:
+                    return True
+                break
+    return False
+
+
+def _nestedClass(mti):
+    """ the typed class values of mti are encoded with, if its declared type is a single typed class """
+    types = _typeTuple(mti.type)
+    if len(types) == 1 and issubclass(types[0], TypedObjectBase):
+        return types[0]
+    return None
+
+def _hasTypedValues(mti):
+    for t in _typeTuple(mti.type):
+        if isclass(t) and issubclass(t, TypedObjectBase):
+            return True
+    return False
+
+def _encodeNested(val, mti, asTuple):
+    """ encodes a typed object held by member mti. Only values of exactly the declared class can be decoded
+        again (see _generateDecoder), anything else is an error rather than a lossy encoding.
+    """
+    if isinstance(val, TypedObjectBase):
+        cls = _nestedClass(mti)
+        if type(val) is not cls:
+            raise TypeError("Member %s holds a %s, only values of its declared class %s can be encoded"
+                            % (mti.name, type(val).__name__, cls.__name__ if cls is not None else mti.type))
+        schema = _resolveSchema(cls)
+        return schema.toTuple(val) if asTuple else schema.toDict(val)
+    return val
+
+def _generateEncoder(schema, asTuple):
+    """ generates toDict / toTuple for schema. Members holding typed objects are encoded recursively """
+    ns = {"_encode": _encodeNested}
+    name = "toTuple" if asTuple else "toDict"
+    lines = ["def %s(self):" % name]
+    values = []
+    for i, mti in enumerate(schema.memberList):
+        ns["_n%d" % i] = mti.name
+        value = _attrGetter("self", mti.name, ns, "_n%d" % i)
+        if _hasTypedValues(mti):
+            ns["_mti%d" % i] = mti
+            value = "_encode(%s, _mti%d, %s)" % (value, i, asTuple)
+        values.append(value if asTuple else "_n%d: %s" % (i, value))
+    if asTuple:
+        lines.append("    return (%s)" % "".join(v + ", " for v in values))
+    else:
+        lines.append("    return {%s}" % ", ".join(values))
+    return _makeFunction(name, lines, ns, schema)
+
+def _generateDecoder(schema, asTuple):
+    """ generates fromDict(d, validate) / fromTuple(t, validate) for schema. Decoded objects are created
+        without calling __init__, members missing from the dict get their initMembers value. Values are
+        checked in the same pass when validate is set.
+    """
+    cls = schema.cls
+    name = "fromTuple" if asTuple else "fromDict"
+    ns = {"_cls": cls, "_M": _MISSING, "_names": frozenset(schema.members), "_count": len(schema.memberList)}
+    lines = ["def %s(data, validate=False):" % name]
+    if asTuple:
+        lines += ["    if len(data) != _count:",
+                  "        raise TypeError('%s expects a tuple of %%d members, got %%d' %% (_count, len(data)))" % cls.__name__]
+    else:
+        lines.append("    found = 0")
+    lines.append("    obj = _cls.__new__(_cls)")
+    for i, mti in enumerate(schema.memberList):
+        ns["_n%d" % i] = mti.name
+        ns["_mt%d" % i] = mti.type
+        if asTuple:
+            lines.append("    val = data[%d]" % i)
+        else:
+            lines += ["    val = data.get(_n%d, _M)" % i,
+                      "    if val is _M:",
+                      "        val = %s" % _defaultSource(mti, i, ns, True),
+                      "    else:",
+                      "        found += 1"]
+        nested = _nestedClass(mti)
+        if nested is not None:
+            ns["_T%d" % i] = nested
+            lines += ["    if isinstance(val, %s):" % ("tuple" if asTuple else "dict"),
+                      "        val = _T%d.%s(val, validate)" % (i, name)]
+        lines.append("    if validate:")
+        if not mti.nullable:
+            lines += ["        if val is None:",
+                      "            raise TypeError('Member %%s of %%s may not be null' %% (_n%d, _cls.__name__))" % i]
+        if _definedBelow(type(mti), MemberTypeInfo, "validateValue"):
+            ns["_mti%d" % i] = mti
+            check = "not _mti%d.validateValue(val, throw=False)" % i
+        else:
+            ns["_t%d" % i] = _typeTuple(mti.type)
+            check = "not isinstance(val, _t%d)" % i
+        lines += ["        if val is not None and %s:" % check,
+                  "            raise TypeError('Member %%s of %%s is not of type %%s (found %%s of type %%s)'"
+                  " %% (_n%d, _cls.__name__, _mt%d, val, type(val)))" % (i, i)]
+        desc = _enforcedDescriptor(cls, mti.name)
+        if mti.none_on_init and not mti.nullable and desc is not None and desc.check:
+            # as in initMembers, none_on_init members may hold None until they are set
+            ns["_raw%d" % i] = desc.setRaw
+            lines += ["    if val is None:",
+                      "        _raw%d(obj, None)" % i,
+                      "    else:",
+                      "        " + _assignSource("obj", mti, i, "val", ns, schema.frozen)]
+        else:
+            lines.append("    " + _assignSource("obj", mti, i, "val", ns, schema.frozen))
+    if not asTuple:
+        lines += ["    if found != len(data):",
+                  "        raise Exception('Cannot initialize attribute %s: attibute not found.'"
+                  " % (', '.join(sorted(k for k in data if k not in _names)),))"]
+    lines.append("    return obj")
+    return _makeFunction(name, lines, ns, schema)
+
+
+class _cachedProperty(object):
+    """ computes an attribute on first access and stores it on the instance """
+
+    def __init__(self, func):
+        self._func = func
+        functools.update_wrapper(self, func)
+
+    def __get__(self, obj, cls):
+        if obj is None:
+            return self
+        value = obj.__dict__[self._func.__name__] = self._func(obj)
+        return value
+
+
+class ResolvedSchema(object):
+    """ The merged type info of a class and all its bases, as seen by TypedObjectBase.
+
+        Built once per class and cached on it. The schema remembers which __typeinfo__ object every
+        class in the mro had when it was built, so reassigning __typeinfo__ on the class or any of
+        its bases makes it stale and it is rebuilt on next use.
+    """
+
+    def __init__(self, cls):
+        self.cls = cls
+        self.members = TypedObjectBase._walkTypeInfo(cls)
+        self.memberList = sorted(self.members.values(), key=MemberTypeInfo.sortKey)
+        # ordered view of the members, shared by listTypes, repr and the codecs
+        self.names = tuple(mti.name for mti in self.memberList)
+        self.types = tuple(mti.type for mti in self.memberList)
+        self.positions = dict((name, i) for i, name in enumerate(self.names))
+        self._stamp = tuple((c, c.__dict__.get("__typeinfo__")) for c in cls.__mro__)
+        self.generatedCode = {}
+        self.validator = None
+        # the dirty set can only be trusted if every member assignment is tracked
+        self.incremental = bool(getattr(cls, "__typeinfo_incremental__", False)) and all(
+            desc is not None and desc.track for desc in (_enforcedDescriptor(cls, name) for name in self.members))
+        self.frozen = bool(getattr(cls, "__typeinfo_frozen__", False))
+        if getattr(cls, "__typeinfo_compile__", False):
+            self.compile()
+
+    def compile(self):
+        """ generates the specialized code for this schema """
+        self.validator = _generateValidator(self)
+        for name in _GENERATED_FUNCTIONS:
+            getattr(self, name)
+
+    @_cachedProperty
+    def fingerprint(self):
+        """ identifies the class and its member definitions, keys the persistent schema cache """
+        members = [(mti.name, type(mti).__name__, [(t.__module__, t.__name__) for t in _typeTuple(mti.type)],
+                    mti.nullable, repr(mti.default), mti.order, mti.none_on_init) for mti in self.memberList]
+        return hashlib.md5(repr((self.cls.__module__, self.cls.__name__, members))).hexdigest()
+
+    @_cachedProperty
+    def initMembers(self):
+        return _generateInitializer(self, "initMembers", True)
+
+    @_cachedProperty
+    def setToDefaults(self):
+        return _generateInitializer(self, "setToDefaults", False)
+
+    @_cachedProperty
+    def assignmentChecked(self):
+        """ True if every assignment to a member is checked by a TypedMemberDescriptor, so (except for direct
+            __dict__ manipulation) instances always hold valid members and need no full validation.
+        """
+        for mti in self.memberList:
+            desc = _enforcedDescriptor(self.cls, mti.name)
+            if desc is None or not desc.check or (mti.none_on_init and not mti.nullable):
+                return False
+        return True
+
+    @_cachedProperty
+    def construct(self):
+        return _generateConstructor(self)
+
+    @_cachedProperty
+    def toDict(self):
+        return _generateEncoder(self, False)
+
+    @_cachedProperty
+    def toTuple(self):
+        return _generateEncoder(self, True)
+
+    @_cachedProperty
+    def fromDict(self):
+        return _generateDecoder(self, False)
+
+    @_cachedProperty
+    def fromTuple(self):
+        return _generateDecoder(self, True)
+
+    @_cachedProperty
+    def copy(self):
+        return _generateCopier(self, False)
+
+    @_cachedProperty
+    def deepcopy(self):
+        return _generateCopier(self, True)
+
+    @_cachedProperty
+    def stateSlots(self):
+        """ the instance slots of the class not holding typed members or internal state """
+        storage = set(self.members)
+        storage.update(_STORAGE_PREFIX + name for name in self.members)
+        return tuple(sorted(_slotNames([self.cls]) - storage - _BOOKKEEPING - set(["__weakref__", "__dict__"])))
+
+    @_cachedProperty
+    def eq(self):
+        return _generateEquality(self)
+
+    @_cachedProperty
+    def hash(self):
+        return _generateHash(self)
+
+    def isCurrent(self):
+        for c, ti in self._stamp:
+            if c.__dict__.get("__typeinfo__") is not ti:
+                return False
+        return True
+
+
+def _resolveSchema(cls):
+    """ returns the (cached) ResolvedSchema of cls """
+    schema = cls.__dict__.get("__typeinfo_schema__")
+    if schema is None or not schema.isCurrent():
+        schema = ResolvedSchema(cls)
+        setattr(cls, "__typeinfo_schema__", schema)
+    return schema
+
+
+_STAT_EVENTS = ("validate", "construct", "initMembers", "check")
+
+class _ClassStats(object):
+    __slots__ = ("counts", "times", "failures", "memberFailures", "memberCounts", "memberTimes")
+
+    def __init__(self):
+        self.counts = dict.fromkeys(_STAT_EVENTS, 0)
+        self.times = dict.fromkeys(_STAT_EVENTS, 0.0)
+        self.failures = 0
+        self.memberFailures = {}
+        self.memberCounts = {}
+        self.memberTimes = {}
+
+    def snapshot(self):
+        ret = {"failures": self.failures, "member_failures": dict(self.memberFailures),
+               "member_validations": dict(self.memberCounts), "member_validate_time": dict(self.memberTimes)}
+        for event in _STAT_EVENTS:
+            ret[event] = self.counts[event]
+            ret[event + "_time"] = self.times[event]
+        return ret
+
+
+class _Stats(object):
+    """ the counters behind stats(). Updates aren't locked, so under threads counts are approximate. """
+
+    def __init__(self, hook=None):
+        self.classes = weakref.WeakKeyDictionary()
+        self.hook = hook
+
+    def _classStats(self, cls):
+        try:
+            return self.classes[cls]
+        except KeyError:
+            ret = self.classes[cls] = _ClassStats()
+            return ret
+
+    def record(self, event, cls, seconds, member=None):
+        cs = self._classStats(cls)
+        if event == "failure":
+            cs.failures += 1
+            if member is not None:
+                cs.memberFailures[member] = cs.memberFailures.get(member, 0) + 1
+        else:
+            cs.counts[event] += 1
+            cs.times[event] += seconds
+        if self.hook is not None:
+            self.hook(event, cls, member, seconds)
+
+    def timedMember(self, obj, mti, throw):
+        """ per member counters of the interpreted validation, not passed to the hook """
+        start = _timer()
+        try:
+            return TypedObjectBase._checkMember(obj, mti, throw)
+        finally:
+            seconds = _timer() - start
+            cs = self._classStats(type(obj))
+            cs.memberCounts[mti.name] = cs.memberCounts.get(mti.name, 0) + 1
+            cs.memberTimes[mti.name] = cs.memberTimes.get(mti.name, 0.0) + seconds
+
+    def timed(self, event, cls, func, *args):
+        start = _timer()
+        try:
+            return func(*args)
+        finally:
+            self.record(event, cls, _timer() - start)
+
+    def timedValidation(self, obj, throw, force):
+        start = _timer()
+        ok = False
+        try:
+            ok = TypedObjectBase._validateMemberTypes(obj, throw, force)
+            return ok
+        finally:
+            cls = type(obj)
+            self.record("validate", cls, _timer() - start)
+            if not ok:
+                self.record("failure", cls, 0.0, _failingMember(obj))
+
+def _failingMember(obj):
+    """ the name of the first invalid member of obj (the validators only tell whether there is one) """
+    for mti in _resolveSchema(type(obj)).memberList:
+        val = getattr(obj, mti.name, _MISSING)
+        if val is None:
+            if not mti.nullable:
+                return mti.name
+        elif val is _MISSING or not mti.validateValue(val, throw=False):
+            return mti.name
+    return None
+
+_stats = None
+_timer = timeit.default_timer
+
+def enable_stats(hook=None):
+    """ starts collecting validation and construction statistics (see stats()). hook, if given, is called
+        as hook(event, cls, member, seconds) for every event: "validate", "failure" (with the failing member),
+        "construct" (TypedObject.__init__), "initMembers" and "check" (DEBUG_MODE and set_checking checks).
+    """
+    global _stats
+    _stats = _Stats(hook)
+
+def disable_stats():
+    """ stops collecting statistics, the instrumented paths are back to a single global check """
+    global _stats
+    _stats = None
+
+def stats(reset=False):
+    """ snapshot of the statistics collected since enable_stats (or the last reset), a dict of class to a dict
+        with the number of events ("validate", "construct", "initMembers", "check") and their cumulative
+        time ("validate_time", ...), "failures" and "member_failures" (member name to failure count).
+        "member_validations" and "member_validate_time" count and time the checks of every member, but only
+        for classes validated member by member: generated validators (__typeinfo_compile__) check the whole
+        object at once and are only timed per class.
+    """
+    current = _stats
+    if current is None:
+        return {}
+    ret = dict((cls, cs.snapshot()) for cls, cs in current.classes.items())
+    if reset:
+        reset_stats()
+    return ret
+
+def reset_stats():
+    """ zeroes the collected statistics, keeping the hook """
+    if _stats is not None:
+        _stats.classes = weakref.WeakKeyDictionary()
+
+
 class TypedObjectBase(object):
     """ mixin class containing all kind of type info utils """
 
+    __slots__ = ()
+
     @staticmethod
-    def _getTypeInfoDict(obj):
+    def _walkTypeInfo(obj):
         ret = {}
 
-        if not isclass(obj):
-            obj=type(obj)
-
         for base in reversed(obj.__bases__):
             # walking in reverse to mimic attribute lookup semantics """
-            bd = TypedObjectBase._getTypeInfoDict(base)
+            bd = TypedObjectBase._walkTypeInfo(base)
             ret.update(bd)
 
 
@@ -170,72 +989,249 @@ class TypedObjectBase(object):
 
         return ret
 
+    @staticmethod
+    def _getSchema(obj):
+        return _resolveSchema(obj if isclass(obj) else type(obj))
+
+    @classmethod
+    def compile(cls):
+        """ generate specialized validation code for this class (and its subclasses).
+            Classes can also opt in at definition time by setting __typeinfo_compile__ = True
+        """
+        cls.__typeinfo_compile__ = True
+        _resolveSchema(cls).compile()
+
+    @staticmethod
+    def _getTypeInfoDict(obj):
+        return dict(TypedObjectBase._getSchema(obj).members)
+
 
     @staticmethod
     def _getTypeInfoList(obj):
-        ret  = TypedObjectBase._getTypeInfoDict(obj).values()
-        ret.sort()
-        return ret
+        return list(TypedObjectBase._getSchema(obj).memberList)
 
     @class_or_instance
     def listTypes(self):
         """ Enumerates the attributes and types of an object. return is a list of tuples (attname,atttype) """
-        return [(mti.name,mti.type) for mti in TypedObjectBase._getTypeInfoList(self)]
+        schema = TypedObjectBase._getSchema(self)
+        return zip(schema.names, schema.types)
 
     def setToNones(self):
         """ Set all typed attributes to None. Note: this will throw an exception if any members are not nullable """
-        for att,mti in TypedObjectBase._getTypeInfoDict(self).items():
+        for att,mti in TypedObjectBase._getSchema(self).members.iteritems():
             if not mti.nullable:
                 raise TypeError('Member %s is not nullable' % att)
             setattr(self,att,None)
 
     def setToDefaults(self):
         """ set all typed attributes to their default values. Note all types must have a default """
-        for mti in TypedObjectBase._getTypeInfoDict(self).values():
-            if not mti.nullable and mti.default is None:
-                v = mti.type()
-            else:
-                v = deepcopy(mti.default)
-            setattr(self,mti.name,v)
+        TypedObjectBase._getSchema(self).setToDefaults(self)
 
 
     def initMembers(self):
         """ initialize members on init (by defaults, or to none) """
-        for mti in TypedObjectBase._getTypeInfoDict(self).values():
-            if mti.none_on_init:
-                v= None
-            elif not mti.nullable and mti.default is None:
-                v = mti.type()
-            else:
-                v = deepcopy(mti.default)
-            setattr(self,mti.name,v)
+        if _stats is not None:
+            return _stats.timed("initMembers", type(self), TypedObjectBase._getSchema(self).initMembers, self)
+        TypedObjectBase._getSchema(self).initMembers(self)
 
 
-    def validateMemberTypes(self,throw=True):
-        """ scans all typed attributes of obj to see if the derive from or are the types mentioned. """
-        for mti in TypedObjectBase._getTypeInfoDict(self).values():
-            val = getattr(self, mti.name)
-            if val is None:
-                if not mti.nullable:
-                    raise TypeError('Member %s of %s is not nullable but is None' % (mti.name,self,))
-            elif not mti.validateValue(val,throw=False):
-                if throw:
-                    raise TypeError("Member %s of %s is not of type %s (found %s of type %s)" % (mti.name,self,mti.type,val,type(val)))
-                else:
-                    return False
+    def validateMemberTypes(self,throw=True,force=False):
+        """ scans all typed attributes of obj to see if the derive from or are the types mentioned.
+            Classes in __typeinfo_incremental__ mode only check the members assigned since the last successful
+            validation, unless force is set.
+        """
+        if _stats is not None:
+            return _stats.timedValidation(self, throw, force)
+        return TypedObjectBase._validateMemberTypes(self, throw, force)
+
+    @staticmethod
+    def _validateMemberTypes(obj, throw, force):
+        schema = TypedObjectBase._getSchema(obj)
+        if schema.incremental:
+            dirty = getattr(obj, "__typeinfo_dirty__", None)
+            if dirty is not None and not force:
+                for name in dirty:
+                    mti = schema.members.get(name)
+                    if mti is not None and not TypedObjectBase._validateMember(obj, mti, throw):
+                        return False
+                dirty.clear()
+                return True
+            if not TypedObjectBase._validateAll(obj, schema, throw):
+                return False
+            object.__setattr__(obj, "__typeinfo_dirty__", set())
+            return True
+        return TypedObjectBase._validateAll(obj, schema, throw)
+
+    @staticmethod
+    def _validateAll(obj, schema, throw):
+        if schema.validator is not None:
+            return schema.validator(obj, throw)
+        for mti in schema.memberList:
+            if not TypedObjectBase._validateMember(obj, mti, throw):
+                return False
         return True
 
+    @staticmethod
+    def _validateMember(obj, mti, throw):
+        if _stats is not None:
+            return _stats.timedMember(obj, mti, throw)
+        return TypedObjectBase._checkMember(obj, mti, throw)
+
+    @staticmethod
+    def _checkMember(obj, mti, throw):
+        val = getattr(obj, mti.name)
+        if val is None:
+            if not mti.nullable:
+                raise TypeError('Member %s of %s is not nullable but is None' % (mti.name,obj,))
+        elif not mti.validateValue(val,throw=False):
+            if throw:
+                raise TypeError("Member %s of %s is not of type %s (found %s of type %s)" % (mti.name,obj,mti.type,val,type(val)))
+            else:
+                return False
+        return True
+
+    def getDirtyMembers(self):
+        """ the names of the members assigned since the last successful validateMemberTypes, for classes in
+            __typeinfo_incremental__ mode. Objects which were never tracked report all their members.
+        """
+        dirty = getattr(self, "__typeinfo_dirty__", None) if TypedObjectBase._getSchema(self).incremental else None
+        if dirty is None:
+            return frozenset(TypedObjectBase._getSchema(self).members)
+        return frozenset(dirty)
+
     def initFromDict(self, initDict=None, **kwargs):
         if initDict is not None:
-            kwargs.update(initDict)
-        for (k,v) in kwargs.items():
+            if kwargs or type(initDict) is not dict:
+                kwargs.update(initDict) # also takes other mappings and (key, value) sequences
+            else:
+                kwargs = initDict # plain dicts are only read, no need to copy them
+        for (k,v) in kwargs.iteritems():
             setattr(self, k, v)
 
+    def toDict(self):
+        """ returns a dict of the typed members. Members holding typed objects are converted as well. """
+        return _resolveSchema(type(self)).toDict(self)
+
+    def toTuple(self):
+        """ returns a tuple of the typed members, in listTypes order. Members holding typed objects are
+            converted as well.
+        """
+        return _resolveSchema(type(self)).toTuple(self)
+
+    @classmethod
+    def fromDict(cls, data, validate=False):
+        """ creates an instance from a toDict() dict, without calling __init__. Missing members get their
+            initial value, unknown keys are an error. validate=True type checks the values while decoding.
+        """
+        return _resolveSchema(cls).fromDict(data, validate)
+
+    @classmethod
+    def fromTuple(cls, data, validate=False):
+        """ creates an instance from a toTuple() tuple, without calling __init__ (see fromDict) """
+        return _resolveSchema(cls).fromTuple(data, validate)
+
+_STORAGE_PREFIX = "_typeinfo_"
+
+class TypedMemberDescriptor(object):
+    """ data descriptor installed by TypedObjectMetaClass in __typeinfo_enforce__ and __typeinfo_incremental__
+        mode. Checks the type and nullability of every value assigned to the member (check=True) and/or
+        records the member as changed since the last validation (track=True). Values are kept in the instance
+        __dict__ or, for slotted classes, in a slot (_typeinfo_<name>).
+    """
+
+    def __init__(self, mti, slot=None, check=True, track=False):
+        self.mti = mti
+        self.name = mti.name
+        self.nullable = mti.nullable
+        self.slot = slot
+        self.check = check
+        self.track = track
+        if _definedBelow(type(mti), MemberTypeInfo, "validateValue"):
+            self._types = None
+        else:
+            self._types = _typeTuple(mti.type)
+
+    def __get__(self, obj, cls):
+        if obj is None:
+            return self
+        if self.slot is not None:
+            return self.slot.__get__(obj, cls)
+        try:
+            return obj.__dict__[self.name]
+        except KeyError:
+            raise AttributeError("'%s' object has no attribute '%s'" % (type(obj).__name__, self.name))
+
+    def __set__(self, obj, val):
+        if not self.check:
+            pass
+        elif val is None:
+            if not self.nullable:
+                raise TypeError("Member %s of %s may not be null" % (self.name, type(obj).__name__))
+        elif not (isinstance(val, self._types) if self._types is not None else self.mti.validateValue(val, throw=False)):
+            raise TypeError("Member %s of %s is not of type %s (found %s of type %s)"
+                            % (self.name, type(obj).__name__, self.mti.type, val, type(val)))
+        self.setRaw(obj, val)
+
+    def __delete__(self, obj):
+        if self.slot is not None:
+            self.slot.__delete__(obj)
+        else:
+            try:
+                del obj.__dict__[self.name]
+            except KeyError:
+                raise AttributeError(self.name)
+
+    def setRaw(self, obj, val):
+        """ stores val without checking it """
+        if self.slot is not None:
+            self.slot.__set__(obj, val)
+        else:
+            obj.__dict__[self.name] = val
+        if self.track:
+            try:
+                obj.__typeinfo_dirty__.add(self.name)
+            except AttributeError:
+                object.__setattr__(obj, "__typeinfo_dirty__", set([self.name]))
+
+
+def _memberStorage(cls, name):
+    """ returns the slot holding member name for instances of cls, None if it lives in the __dict__ """
+    for c in cls.__mro__:
+        d = c.__dict__
+        if isinstance(d.get(_STORAGE_PREFIX + name), MemberDescriptorType):
+            return d[_STORAGE_PREFIX + name]
+        v = d.get(name)
+        if isinstance(v, MemberDescriptorType):
+            return v
+        if isinstance(v, TypedMemberDescriptor):
+            return v.slot
+    return None
+
+def _installDescriptors(cls, check, track):
+    """ puts a TypedMemberDescriptor for each of the typed members of cls in the class """
+    # not going through _resolveSchema: code generated by it must see the descriptors
+    for mti in TypedObjectBase._walkTypeInfo(cls).values():
+        desc = TypedMemberDescriptor(mti, _memberStorage(cls, mti.name), check=check, track=track)
+        type.__setattr__(cls, mti.name, desc)
+
+def _enforcedDescriptor(cls, name):
+    """ the TypedMemberDescriptor managing member name, if any """
+    for c in cls.__mro__:
+        if name in c.__dict__:
+            v = c.__dict__[name]
+            return v if isinstance(v, TypedMemberDescriptor) else None
+    return None
+
+
+def _checkTyped(o):
+    if isinstance(o,TypedObjectBase) and not _resolveSchema(type(o)).assignmentChecked:
+        if _stats is not None:
+            return _stats.timed("check", type(o), o.validateMemberTypes)
+        o.validateMemberTypes()
+
 def _auto_input_checker(func):
 
-    def test(o):
-        if isinstance(o,TypedObjectBase):
-            o.validateMemberTypes()
+    test = _checkTyped
 
     @functools.wraps(func)
     def checker(*args,**kwargs):
@@ -250,9 +1246,7 @@ def _auto_input_checker(func):
 
 def _auto_output_checker(func):
 
-    def test(o):
-        if isinstance(o,TypedObjectBase):
-            o.validateMemberTypes()
+    test = _checkTyped
 
     @functools.wraps(func)
     def checker(*args,**kwargs):
@@ -267,9 +1261,267 @@ def _auto_output_checker(func):
     return checker
 
 
+class _Sampler(object):
+    """ decides which calls of the checked methods of a class are validated: one in every calls, and at most
+        per_second per second. Counting isn't locked, under threads the rates are approximate.
+    """
+
+    def __init__(self, every=1, per_second=None):
+        self.every = every
+        self.per_second = per_second
+        self._calls = 0
+        self._second = None
+        self._inSecond = 0
+
+    def __call__(self):
+        self._calls += 1
+        if self.every > 1 and self._calls % self.every:
+            return False
+        if self.per_second is not None:
+            now = int(time.time())
+            if now != self._second:
+                self._second = now
+                self._inSecond = 0
+            if self._inSecond >= self.per_second:
+                return False
+            self._inSecond += 1
+        return True
+
+def _sampling_checker(func, sampler, checkInput):
+    """ _auto_output_checker(_auto_input_checker(func)) (just the output checker without checkInput) for the
+        calls sampler picks, other calls go straight to func.
+    """
+
+    test = _checkTyped
+
+    @functools.wraps(func)
+    def checker(*args,**kwargs):
+        if not sampler():
+            return func(*args,**kwargs)
+        if checkInput:
+            for a in args: test(a)
+            for a in kwargs.values(): test(a)
+
+        r = func(*args,**kwargs)
+        if args: test(args[0]) # test self if there
+        test(r)
+
+        return r
+
+    return checker
+
+# methods that are never wrapped: validation errors format the object with them
+_UNCHECKED_METHODS = frozenset(["__repr__", "__str__", "__unicode__"])
+
+_typedClasses = weakref.WeakSet()
+_classSamplers = weakref.WeakKeyDictionary()
+_defaultSampler = None
+
+def _installCheckers(cls, sampler):
+    """ wraps the methods defined in cls with sampling checkers (or just removes them if sampler is None) """
+    _removeCheckers(cls)
+    if sampler is None:
+        return
+    wrapped = {}
+    for name, value in cls.__dict__.items():
+        if isfunction(value) and name not in _UNCHECKED_METHODS and value not in _GENERATED_METHODS:
+            wrapped[name] = (value, _sampling_checker(value, sampler, name != "__init__"))
+            type.__setattr__(cls, name, wrapped[name][1])
+    type.__setattr__(cls, "__typeinfo_checkers__", wrapped)
+
+def _removeCheckers(cls):
+    wrapped = cls.__dict__.get("__typeinfo_checkers__")
+    if wrapped is None:
+        return
+    for name, (original, checker) in wrapped.items():
+        if cls.__dict__.get(name) is checker: # leave methods that were replaced since alone
+            type.__setattr__(cls, name, original)
+    type.__delattr__(cls, "__typeinfo_checkers__")
+
+def set_checking(cls=None, every=1, per_second=None):
+    """ switches on runtime checking: the methods of TypedObject classes validate their typed arguments, self
+        and return value (like in DEBUG_MODE) for one in every calls and at most per_second calls a second.
+        Without cls this is the default for all classes (including ones created later), with cls it only
+        applies to the methods defined in cls. Classes are not redefined, disable_checking restores them.
+    """
+    global _defaultSampler
+    sampler = _Sampler(every, per_second)
+    if cls is None:
+        _defaultSampler = sampler
+        for c in list(_typedClasses):
+            if c not in _classSamplers:
+                _installCheckers(c, sampler)
+    else:
+        _classSamplers[cls] = sampler
+        _installCheckers(cls, sampler)
+
+def disable_checking(cls=None):
+    """ switches runtime checking off for cls, or without cls for all classes (dropping per class settings) """
+    global _defaultSampler
+    if cls is None:
+        _defaultSampler = None
+        _classSamplers.clear()
+        for c in list(_typedClasses):
+            _removeCheckers(c)
+    else:
+        _classSamplers[cls] = None
+        _removeCheckers(cls)
+
+def _typedEq(self, other):
+    return _resolveSchema(type(self)).eq(self, other)
+
+def _typedNe(self, other):
+    equal = _resolveSchema(type(self)).eq(self, other)
+    return equal if equal is NotImplemented else not equal
+
+def _typedHash(self):
+    return _resolveSchema(type(self)).hash(self)
+
+def _frozenSetattr(self, name, value):
+    raise AttributeError("%s is frozen, can't set %s" % (type(self).__name__, name))
+
+def _frozenDelattr(self, name):
+    raise AttributeError("%s is frozen, can't delete %s" % (type(self).__name__, name))
+
+# installed by the metaclass, they only read the members so there is nothing for the checkers to catch
+_GENERATED_METHODS = frozenset([_typedEq, _typedNe, _typedHash, _frozenSetattr, _frozenDelattr])
+
+
+def _initialValue(mti):
+    """ the value initMembers gives mti """
+    if mti.none_on_init:
+        return None
+    if not mti.nullable and mti.default is None:
+        return mti.type()
+    return mti.default
+
+def _internTypes(values):
+    """ the types of values, recursively for tuples, or None if any of them isn't an immutable builtin """
+    ret = []
+    for val in values:
+        tp = type(val)
+        if tp is tuple:
+            tp = _internTypes(val)
+            if tp is None:
+                return None
+        elif tp not in _IMMUTABLE_TYPES:
+            return None
+        ret.append(tp)
+    return tuple(ret)
+
+class _Interner(object):
+    """ the live instances of an interning class (see __typeinfo_intern__), by their member values. Holds
+        them weakly and up to capacity, objects created when it is full are just not shared. Neither are
+        objects with member values other than immutable builtins (None, numbers, strings and tuples of them).
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.cache = weakref.WeakValueDictionary()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, cls, kwargs):
+        schema = _resolveSchema(cls)
+        initial = schema.__dict__.get("initialValues")
+        if initial is None:
+            initial = schema.initialValues = tuple(_initialValue(mti) for mti in schema.memberList)
+        for k in kwargs:
+            if k not in schema.positions:
+                return type.__call__(cls, **kwargs) # let the constructor complain
+        values = tuple([kwargs.get(name, value) for name, value in zip(schema.names, initial)])
+        # types are part of the key, 1 == 1.0 == True
+        types = _internTypes(values)
+        if types is None: # not only immutable values, can't be shared
+            return type.__call__(cls, **kwargs)
+        key = (values, types)
+        obj = self.cache.get(key)
+        if obj is not None:
+            self.hits += 1
+            return obj
+        self.misses += 1
+        obj = type.__call__(cls, **kwargs)
+        if len(self.cache) < self.capacity:
+            obj = self.cache.setdefault(key, obj)
+        return obj
+
+def intern_stats(cls, reset=False):
+    """ the interning counters of cls: a dict with "hits", "misses", the number of live interned objects
+        ("size") and the "capacity"
+    """
+    interner = cls.__dict__.get("__typeinfo_interner__")
+    if interner is None:
+        raise TypeError("%s doesn't intern its instances" % cls.__name__)
+    ret = {"hits": interner.hits, "misses": interner.misses, "size": len(interner.cache),
+           "capacity": interner.capacity}
+    if reset:
+        interner.hits = interner.misses = 0
+    return ret
+
+
+def _classOption(bases, attrs, option):
+    """ value of a class level __typeinfo_*__ option for a class about to be created """
+    if option in attrs:
+        return attrs[option]
+    for base in bases:
+        value = getattr(base, option, None)
+        if value is not None:
+            return value
+    return None
+
+def _slotNames(classes):
+    """ all instance slots already provided by classes (and their bases) """
+    ret = set()
+    for base in classes:
+        for c in getattr(base, "__mro__", ()):
+            slots = c.__dict__.get("__slots__", ())
+            ret.update((slots,) if isinstance(slots, basestring) else slots)
+    return ret
+
+def _memberSlots(bases, attrs, typeinfo, descriptors, bookkeeping):
+    """ the __slots__ for a class created in slots mode: the user supplied slots plus every typed member
+        (own or inherited) that doesn't have storage in one of the bases yet. When the members get a
+        TypedMemberDescriptor the slots are named _typeinfo_<member> so the descriptor can take the member name.
+        bookkeeping are the internal slots (__typeinfo_dirty__, ...) the class needs.
+    """
+    slots = attrs.get("__slots__", ())
+    slots = [slots] if isinstance(slots, basestring) else list(slots)
+
+    members = set(typeinfo._memberInfo if typeinfo is not None else ())
+    for base in bases:
+        members.update(_resolveSchema(base).members)
+
+    inherited = _slotNames(bases)
+    existing = set(n[len(_STORAGE_PREFIX):] if n.startswith(_STORAGE_PREFIX) else n for n in inherited)
+    existing.update(slots)
+    slots.extend((_STORAGE_PREFIX + n if descriptors else n) for n in sorted(members - existing))
+    slots.extend(n for n in bookkeeping if n not in inherited and n not in slots)
+    return tuple(slots)
+
+
 class TypedObjectMetaClass(type):
+    """ Harvests the typed class attributes of a class into its __typeinfo__.
+
+        Class level options (inherited by subclasses):
+            __typeinfo_compile__ = True : generate specialized validation code when the class is created.
+            __typeinfo_slots__ = True : store the typed members in __slots__ instead of an instance __dict__.
+                Python only allows one base with non empty slots, so multiple inheritance is limited to a
+                single slotted typed base.
+            __typeinfo_enforce__ = True : check every assignment to a typed member (see TypedMemberDescriptor).
+                The descriptors are created with the class, they don't follow later reassignments of __typeinfo__.
+            __typeinfo_incremental__ = True : track the members assigned since the last successful
+                validateMemberTypes, which then only checks those (see getDirtyMembers). Members added later
+                (by reassigning __typeinfo__) have no tracking, classes with such members are fully validated.
+            __typeinfo_eq__ = True : generate __eq__, __ne__ and __hash__ comparing the typed members. Note the
+                hash changes with the members, don't modify objects used as dict keys.
+            __typeinfo_frozen__ = True : instances can't be modified after initialization (assignment raises
+                AttributeError) and cache their hash. Implies __typeinfo_eq__.
+            __typeinfo_intern__ = True or a capacity : creating an instance with the member values of a live
+                one returns that one (see intern_stats). Implies __typeinfo_frozen__. Only construction through
+                the class is interned, not fromDict, copies etc.
+    """
 
-     def __new__(cls, name, bases, attrs):
+    def __new__(cls, name, bases, attrs):
         meta_info = dict()
 
         def istypeinfo(att,value):
@@ -291,7 +1543,55 @@ class TypedObjectMetaClass(type):
             mi = TypeInfo(**meta_info)
             attrs["__typeinfo__"] = mi
 
-        return type.__new__(cls, name, bases, attrs)
+        enforce = bool(_classOption(bases, attrs, "__typeinfo_enforce__"))
+        incremental = bool(_classOption(bases, attrs, "__typeinfo_incremental__"))
+        intern = _classOption(bases, attrs, "__typeinfo_intern__")
+        if intern:
+            if not issubclass(cls, _InterningMetaClass):
+                if cls is not TypedObjectMetaClass:
+                    raise TypeError("__typeinfo_intern__ needs a metaclass derived from _InterningMetaClass")
+                cls = _InterningMetaClass
+            attrs["__typeinfo_frozen__"] = True
+            attrs["__typeinfo_interner__"] = _Interner(INTERN_CAPACITY if intern is True else intern)
+        frozen = bool(_classOption(bases, attrs, "__typeinfo_frozen__"))
+        if frozen or _classOption(bases, attrs, "__typeinfo_eq__"):
+            attrs.setdefault("__eq__", _typedEq)
+            attrs.setdefault("__ne__", _typedNe)
+            attrs.setdefault("__hash__", _typedHash)
+        if frozen:
+            attrs.setdefault("__setattr__", _frozenSetattr)
+            attrs.setdefault("__delattr__", _frozenDelattr)
+        if _classOption(bases, attrs, "__typeinfo_slots__"):
+            bookkeeping = [n for n, used in (("__typeinfo_dirty__", incremental), ("__typeinfo_hash__", frozen)) if used]
+            if intern and not any(b.__weakrefoffset__ for b in bases):
+                bookkeeping.append("__weakref__")
+            attrs["__slots__"] = _memberSlots(bases, attrs, attrs.get("__typeinfo__"),
+                                              enforce or incremental, bookkeeping)
+
+        newcls = type.__new__(cls, name, bases, attrs)
+        if enforce or incremental:
+            _installDescriptors(newcls, check=enforce, track=incremental)
+        if _hasPickleHooks(newcls):
+            # the generated copiers would bypass them, copy falls back to the pickle protocol with None
+            for name in ("__copy__", "__deepcopy__"):
+                if name not in attrs:
+                    type.__setattr__(newcls, name, None)
+        if getattr(newcls, "__typeinfo_compile__", False):
+            _resolveSchema(newcls) # compiles as a side effect
+        if bases != (TypedObjectBase,): # not TypedObject itself
+            _typedClasses.add(newcls)
+            if _defaultSampler is not None:
+                _installCheckers(newcls, _defaultSampler)
+        return newcls
+
+class _InterningMetaClass(TypedObjectMetaClass):
+    """ metaclass of the classes with __typeinfo_intern__, constructs through their _Interner """
+
+    def __call__(cls, *args, **kwargs):
+        interner = cls.__dict__.get("__typeinfo_interner__")
+        if interner is None or args:
+            return type.__call__(cls, *args, **kwargs)
+        return interner.get(cls, kwargs)
 
 
 class TypedObject(TypedObjectBase):
@@ -305,20 +1605,24 @@ class TypedObject(TypedObjectBase):
     """
 
     __metaclass__ = TypedObjectMetaClass
-
+    __slots__ = ()
 
     def __init__(self,**kwargs):
-        self.initMembers()
-        for k,v in kwargs.iteritems():
-            if not hasattr(self,k):
-                raise Exception("Cannot initialize attribute %s: attibute not found." % (k,))
-            setattr(self,k,v)
+        if _stats is not None:
+            return _stats.timed("construct", type(self), _resolveSchema(type(self)).construct, self, kwargs)
+        _resolveSchema(type(self)).construct(self, kwargs)
+
+    def __copy__(self):
+        return _resolveSchema(type(self)).copy(self)
+
+    def __deepcopy__(self, memo):
+        return _resolveSchema(type(self)).deepcopy(self, memo)
 
     def __repr__(self):
         return (self.__class__.__name__
                 + '('
                 + ', '.join(u'{attr}={val}'.format(attr=repr(attr), val=repr(getattr(self, attr, None)))
-                            for (attr, _) in self.listTypes())
+                            for attr in TypedObjectBase._getSchema(self).names)
                 + ')')
 
 
@@ -335,3 +1639,1059 @@ class NonNullable(MemberTypeInfo):
         kwargs["nullable"] = False
         super(NonNullable,self).__init__(**kwargs)
 
+
+class StringType(MemberTypeInfo):
+    """ a str (or with type=unicode, unicode) member. width is the maximal length, it is required for
+        fixed size storage such as TypedArray.
+    """
+    def __init__(self,width=None,**kwargs):
+        kwargs.setdefault("type",str)
+        self.width = width
+        super(StringType,self).__init__(**kwargs)
+
+
+
+def _memberCheck(mti):
+    """ returns check(val) -> bool for values of mti (None is handled by the caller) """
+    if _definedBelow(type(mti), MemberTypeInfo, "validateValue"):
+        return lambda val: mti.validateValue(val, throw=False)
+    if _hasAbc(mti):
+        return mti.acceptsValue
+    types = _typeTuple(mti.type)
+    return lambda val: isinstance(val, types)
+
+def _failingPositions(mti, values, check):
+    """ the positions of the values that aren't valid for mti """
+    nullable = mti.nullable
+    ret = []
+    for i, val in enumerate(values):
+        if val is None:
+            if not nullable:
+                ret.append(i)
+        elif val is _MISSING or not check(val):
+            ret.append(i)
+    return ret
+
+def validate_many(objects, throw=False):
+    """ validates a batch of typed objects. Objects are grouped by class and checked member by member over
+        the whole group (the schema is resolved once per class). Objects that aren't TypedObjectBase
+        instances are skipped.
+
+        returns a list of (index, member name) tuples for every failing member, ordered by index. With
+        throw=True a TypeError is raised for the first failing object instead.
+    """
+    objects = objects if isinstance(objects, (list, tuple)) else list(objects)
+    groups = {}
+    for i, obj in enumerate(objects):
+        if isinstance(obj, TypedObjectBase):
+            groups.setdefault(type(obj), []).append(i)
+
+    failures = []
+    for cls, indices in groups.iteritems():
+        group = [objects[i] for i in indices]
+        for mti in _resolveSchema(cls).memberList:
+            name = mti.name
+            try:
+                values = map(operator.attrgetter(name), group)
+            except AttributeError:
+                values = [getattr(o, name, _MISSING) for o in group]
+            failures.extend((indices[i], name) for i in _failingPositions(mti, values, _memberCheck(mti)))
+
+    failures.sort()
+    if throw and failures:
+        index, name = failures[0]
+        obj = objects[index]
+        val = getattr(obj, name, _MISSING)
+        mti = _resolveSchema(type(obj)).members[name]
+        if val is _MISSING:
+            raise TypeError("Member %s of %s is missing (object %d)" % (name, obj, index))
+        if val is None:
+            raise TypeError("Member %s of %s is not nullable but is None (object %d)" % (name, obj, index))
+        raise TypeError("Member %s of %s is not of type %s (found %s of type %s) (object %d)"
+                        % (name, obj, mti.type, val, type(val), index))
+    return failures
+
+_CONTAINER_TYPES = (list, tuple, set, frozenset, dict)
+
+def validate_deep(root, throw=False):
+    """ validates root and every typed object reachable from it through typed members and the lists, tuples,
+        sets and dicts they hold. The graph is walked iteratively and every object is checked once, however
+        often it is referenced (cycles included).
+
+        returns a list of (path, message) tuples for the failing members in walk order, path being the
+        attribute path from root (e.g. "lines[2].price"). With throw=True a TypeError is raised for the first
+        failure instead.
+    """
+    failures = []
+    members = {}
+    visited = set()
+    stack = [(root, "")]
+    while stack:
+        obj, path = stack.pop()
+        if id(obj) in visited:
+            continue
+        visited.add(id(obj))
+        if isinstance(obj, TypedObjectBase):
+            cls = type(obj)
+            checks = members.get(cls)
+            if checks is None:
+                checks = members[cls] = [(mti, _memberCheck(mti)) for mti in _resolveSchema(cls).memberList]
+            prefix = path + "." if path else ""
+            children = []
+            for mti, check in checks:
+                val = getattr(obj, mti.name, _MISSING)
+                message = None
+                if val is _MISSING:
+                    message = "is missing"
+                elif val is None:
+                    if not mti.nullable:
+                        message = "is not nullable but is None"
+                elif not check(val):
+                    message = "is not of type %s (found %s of type %s)" % (mti.type, val, type(val))
+                if message is not None:
+                    if throw:
+                        raise TypeError("Member %s of %s %s" % (prefix + mti.name, type(root).__name__, message))
+                    failures.append((prefix + mti.name, message))
+                if isinstance(val, TypedObjectBase) or isinstance(val, _CONTAINER_TYPES):
+                    children.append((val, prefix + mti.name))
+        elif isinstance(obj, dict):
+            children = [(v, "%s[%r]" % (path, k)) for k, v in obj.iteritems()]
+        elif isinstance(obj, _CONTAINER_TYPES):
+            children = [(v, "%s[%d]" % (path, i)) for i, v in enumerate(obj)]
+        else:
+            continue
+        stack.extend(child for child in reversed(children)
+                     if isinstance(child[0], TypedObjectBase) or isinstance(child[0], _CONTAINER_TYPES))
+    return failures
+
+
+class ObjectPool(object):
+    """ recycles instances of a TypedObject class. acquire(**kwargs) is equivalent to cls(**kwargs) but reuses
+        a released instance when there is one, resetting it with the generated constructor (initMembers and
+        the kwargs assignment). Attributes that aren't typed members (in the instance __dict__ or untyped
+        slots) are removed on release. Up to capacity released instances are kept, further ones are left to
+        the garbage collector. Pooled instances keep their member values until they are acquired again.
+        Thread safe.
+
+            pool = ObjectPool(Request, capacity=256)
+            with pool.borrow(path="/") as req:
+                ...
+    """
+
+    def __init__(self, cls, capacity=64):
+        if not (isclass(cls) and issubclass(cls, TypedObject)):
+            raise TypeError("ObjectPool needs a TypedObject class, got %r" % (cls,))
+        if _definedBelow(cls, TypedObject, "__init__"):
+            raise TypeError("%s defines its own __init__, which recycled instances would skip" % cls.__name__)
+        if getattr(cls, "__typeinfo_frozen__", False):
+            raise TypeError("instances of frozen class %s can't be recycled" % cls.__name__)
+        self.cls = cls
+        self.capacity = capacity
+        self._free = []
+        self._pooled = set() # ids of the instances in _free, to catch double releases
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+        self.released = 0
+        self.dropped = 0
+
+    def acquire(self, **kwargs):
+        """ returns an initialized instance with the kwargs members set, like cls(**kwargs) """
+        with self._lock:
+            if self._free:
+                obj = self._free.pop()
+                self._pooled.discard(id(obj))
+                self.reused += 1
+            else:
+                obj = None
+                self.created += 1
+        if obj is None:
+            return self.cls(**kwargs)
+        _resolveSchema(self.cls).construct(obj, kwargs)
+        return obj
+
+    def release(self, obj):
+        """ hands obj back to the pool, it must not be used afterwards """
+        if type(obj) is not self.cls:
+            raise TypeError("ObjectPool of %s can't take a %s" % (self.cls.__name__, type(obj).__name__))
+        with self._lock:
+            if id(obj) in self._pooled:
+                raise ValueError("%r was already released" % (obj,))
+            self._clearState(obj)
+            self.released += 1
+            if len(self._free) < self.capacity:
+                self._free.append(obj)
+                self._pooled.add(id(obj))
+            else:
+                self.dropped += 1
+
+    def _clearState(self, obj):
+        """ removes whatever the previous user stored besides the typed members """
+        schema = _resolveSchema(self.cls)
+        d = getattr(obj, "__dict__", None)
+        if d:
+            for name in [k for k in d if k not in schema.members]:
+                del d[name]
+        for name in schema.stateSlots:
+            try:
+                delattr(obj, name)
+            except AttributeError:
+                pass
+
+    def borrow(self, **kwargs):
+        """ context manager acquiring an instance and releasing it on exit """
+        return _Borrowed(self, self.acquire(**kwargs))
+
+    def clear(self):
+        """ drops the pooled instances """
+        with self._lock:
+            del self._free[:]
+            self._pooled.clear()
+
+    def stats(self):
+        """ the pool counters: "created", "reused", "released", "dropped" (released when full), the number of
+            pooled instances ("size") and the "capacity"
+        """
+        with self._lock:
+            return {"created": self.created, "reused": self.reused, "released": self.released,
+                    "dropped": self.dropped, "size": len(self._free), "capacity": self.capacity}
+
+class _Borrowed(object):
+
+    def __init__(self, pool, obj):
+        self.pool = pool
+        self.obj = obj
+
+    def __enter__(self):
+        return self.obj
+
+    def __exit__(self, *exc):
+        self.pool.release(self.obj)
+        return False
+
+
+def _fixedKind(mti):
+    """ the kind of fixed size storage for a member: "int", "float", "bool", "str" or "unicode" (the later
+        two with their width). Raises TypeError for members that can't be stored in fixed size.
+    """
+    types = set(_typeTuple(mti.type))
+    if types <= set([int, long]):
+        return "int", None
+    if types == set([float]):
+        return "float", None
+    if types == set([bool]):
+        return "bool", None
+    width = getattr(mti, "width", None)
+    if width and types == set([str]):
+        return "str", width
+    if width and types == set([unicode]):
+        return "unicode", width
+    raise TypeError("Member %s of type %s has no fixed size representation (use int, long, float, bool"
+                    " or StringType with a width)" % (mti.name, mti.type))
+
+_NUMPY_KINDS = {"int": "<i8", "float": "<f8", "bool": "?", "str": "S%d", "unicode": "U%d"}
+
+def _numpy():
+    """ imports numpy on demand, it is only needed for TypedArray """
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("TypedArray requires numpy")
+    return numpy
+
+
+class TypedArray(object):
+    """ a columnar container of instances of a typed class, backed by numpy.
+
+        Every member becomes a column of a structured numpy array (see dtype), with a boolean null mask per
+        member next to it. Members must be int/long, float, bool or a StringType with a width. Appended
+        values are type checked; null values of non nullable members are stored (masked) and reported by
+        validate().
+
+        Indexing with an int returns a row object, a lightweight typed view on the stored values. Slices,
+        boolean masks and index arrays return a new TypedArray (slices share the storage).
+    """
+
+    def __init__(self, cls, objects=(), capacity=16):
+        np = _numpy()
+        self.cls = cls
+        schema = _resolveSchema(cls)
+        self._members = [(mti, _memberCheck(mti)) + _fixedKind(mti) for mti in schema.memberList]
+        self.names = schema.names
+        self.dtype = np.dtype([(mti.name, _NUMPY_KINDS[kind] % width if width else _NUMPY_KINDS[kind])
+                               for mti, _, kind, width in self._members])
+        self._maskDtype = np.dtype([(name, "?") for name in self.names])
+        self._data = np.zeros(max(capacity, 1), dtype=self.dtype)
+        self._nulls = np.zeros(max(capacity, 1), dtype=self._maskDtype)
+        self._len = 0
+        self._rowClass = _arrayRowClass(schema)
+        self.extend(objects)
+
+    @classmethod
+    def _wrap(cls, template, data, nulls):
+        ret = cls.__new__(cls)
+        ret.__dict__.update(template.__dict__)
+        ret._data = data
+        ret._nulls = nulls
+        ret._len = len(data)
+        return ret
+
+    def __len__(self):
+        return self._len
+
+    def _reserve(self, size):
+        if size <= len(self._data):
+            return
+        np = _numpy()
+        capacity = max(size, 2 * len(self._data))
+        data = np.zeros(capacity, dtype=self.dtype)
+        nulls = np.zeros(capacity, dtype=self._maskDtype)
+        data[:self._len] = self._data[:self._len]
+        nulls[:self._len] = self._nulls[:self._len]
+        self._data, self._nulls = data, nulls
+
+    def _checked(self, mti, check, kind, width, val):
+        if val is None:
+            return True
+        if not check(val):
+            raise TypeError("Member %s of %s is not of type %s (found %s of type %s)"
+                            % (mti.name, self.cls.__name__, mti.type, val, type(val)))
+        if width is not None and len(val) > width:
+            raise ValueError("Member %s of %s is longer than %d" % (mti.name, self.cls.__name__, width))
+        return False
+
+    def append(self, obj):
+        """ appends the member values of obj (any object with the members of the class) """
+        row = [(mti.name, val, self._checked(mti, check, kind, width, val))
+               for mti, check, kind, width, val in ((m + (getattr(obj, m[0].name),)) for m in self._members)]
+        # everything is checked before writing, and the null flags of the slot are always written: a slot
+        # can hold leftovers of an earlier failed append
+        self._reserve(self._len + 1)
+        i = self._len
+        for name, val, isNull in row:
+            self._nulls[name][i] = isNull
+            if not isNull:
+                self._data[name][i] = val
+        self._len += 1
+
+    def extend(self, objects):
+        """ appends the member values of all objects, column by column """
+        objects = objects if isinstance(objects, (list, tuple)) else list(objects)
+        if not objects:
+            return
+        columns = []
+        for mti, check, kind, width in self._members:
+            values = map(operator.attrgetter(mti.name), objects)
+            nulls = [self._checked(mti, check, kind, width, val) for val in values]
+            if any(nulls):
+                values = [v if v is not None else self.dtype[mti.name].type() for v in values]
+            columns.append((mti.name, values, nulls))
+        start, end = self._len, self._len + len(objects)
+        self._reserve(end)
+        for name, values, nulls in columns:
+            self._nulls[name][start:end] = nulls
+            self._data[name][start:end] = values
+        self._len = end
+
+    def column(self, name):
+        """ the values of a member as a numpy array (a view). Columns with nulls are returned as masked arrays """
+        values = self._data[name][:self._len]
+        nulls = self._nulls[name][:self._len]
+        if nulls.any():
+            return _numpy().ma.masked_array(values, mask=nulls)
+        return values
+
+    def nulls(self, name):
+        """ the null mask of a member (a view) """
+        return self._nulls[name][:self._len]
+
+    def validate(self):
+        """ vectorized validation of the whole array: returns (index, member) tuples like validate_many.
+            Values are type checked when they are added, so only nullability is left to check.
+        """
+        np = _numpy()
+        failures = []
+        for mti, check, kind, width in self._members:
+            if not mti.nullable:
+                failures.extend((int(i), mti.name) for i in np.flatnonzero(self._nulls[mti.name][:self._len]))
+        failures.sort()
+        return failures
+
+    def filter(self, mask):
+        """ a new TypedArray with the rows for which the boolean mask is set """
+        return self[_numpy().asarray(mask, dtype=bool)]
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, long)):
+            if index < 0:
+                index += self._len
+            if not 0 <= index < self._len:
+                raise IndexError("TypedArray index out of range")
+            return self._rowClass(self, index)
+        return TypedArray._wrap(self, self._data[:self._len][index], self._nulls[:self._len][index])
+
+    def __iter__(self):
+        rowClass = self._rowClass
+        for i in xrange(self._len):
+            yield rowClass(self, i)
+
+    def toObjects(self):
+        """ materializes the rows as instances of the class """
+        return [row.toObject() for row in self]
+
+    def __repr__(self):
+        return "TypedArray(%s, %d rows)" % (self.cls.__name__, self._len)
+
+
+def _arrayRowGetter(name):
+    def get(self):
+        array = self._array
+        if array._nulls[name][self._index]:
+            return None
+        return array._data[name][self._index].item()
+    return get
+
+def _arrayRowSetter(name, position):
+    def set(self, val):
+        array = self._array
+        isNull = array._checked(*(array._members[position] + (val,)))
+        array._nulls[name][self._index] = isNull
+        if not isNull:
+            array._data[name][self._index] = val
+    return set
+
+class _ArrayRow(TypedObjectBase):
+    """ base of the row objects of a TypedArray """
+    __slots__ = ("_array", "_index")
+
+    def __init__(self, array, index):
+        self._array = array
+        self._index = index
+
+    def toObject(self):
+        """ returns a new instance of the array class holding the values of this row """
+        return self._array.cls.fromTuple(tuple(getattr(self, name) for name in self._array.names))
+
+    def __repr__(self):
+        return (self._array.cls.__name__ + "Row("
+                + ", ".join("%r=%r" % (name, getattr(self, name)) for name in self._array.names) + ")")
+
+def _arrayRowClass(schema):
+    """ the row class for TypedArrays of the class of schema, typed like it """
+    if "arrayRowClass" not in schema.__dict__:
+        ti = TypeInfo()
+        ti._memberInfo = dict(schema.members)
+        attrs = {"__slots__": (), "__typeinfo__": ti}
+        for name, position in schema.positions.iteritems():
+            attrs[name] = property(_arrayRowGetter(name), _arrayRowSetter(name, position))
+        schema.arrayRowClass = type(schema.cls.__name__ + "Row", (_ArrayRow,), attrs)
+    return schema.arrayRowClass
+
+
+_RECORD_MAGIC = b"TIR1"
+_LENGTH = struct.Struct("<I")
+_FIXED_CODES = {"int": "q", "float": "d", "bool": "?"}
+
+class RecordPacker(object):
+    """ packs typed objects into a compact binary record derived from their schema, and back.
+
+        A record is a null bitmap (one bit per member, in listTypes order), followed by the fixed size
+        members (int/long as 8 bytes, float as a double, bool as a byte) and then the variable size members
+        (str, unicode as utf-8 and members of a typed class as nested records), each prefixed by its length.
+
+        pack/packMany/dump write a header with a fingerprint of the schema; unpack/unpackMany/load refuse
+        data with a different fingerprint. In streams every record is prefixed by its length.
+    """
+
+    def __init__(self, cls):
+        self.cls = cls
+        schema = _resolveSchema(cls)
+        self._count = len(schema.memberList)
+        self._bitmapSize = (self._count + 7) // 8
+        fixed = []
+        self._fixed = []        # (position, kind)
+        self._variable = []     # (position, kind, nested packer)
+        self._checks = []       # (position, member, check) of the non nested members
+        layout = []
+        for i, mti in enumerate(schema.memberList):
+            types = set(_typeTuple(mti.type))
+            nested = _nestedClass(mti)
+            if nested is None:
+                self._checks.append((i, mti, _memberCheck(mti)))
+            if types <= set([int, long]) or types == set([float]) or types == set([bool]):
+                kind = _fixedKind(mti)[0]
+                fixed.append(_FIXED_CODES[kind])
+                self._fixed.append((i, kind))
+                layout.append((mti.name, kind))
+            elif types == set([str]) or types == set([unicode]):
+                kind = "str" if str in types else "unicode"
+                self._variable.append((i, kind, None))
+                layout.append((mti.name, kind))
+            elif nested is not None:
+                packer = RecordPacker(nested)
+                self._variable.append((i, "nested", packer))
+                layout.append((mti.name, packer.fingerprint))
+            else:
+                raise TypeError("Member %s of type %s has no binary representation (use int, long, float,"
+                                " bool, str, unicode or a typed class)" % (mti.name, mti.type))
+        self._struct = struct.Struct("<" + "".join(fixed))
+        self._zeros = tuple({"int": 0, "float": 0.0, "bool": False}[kind] for _, kind in self._fixed)
+        self.fingerprint = hashlib.md5(repr((cls.__module__, cls.__name__, layout))).digest()[:8]
+        self.header = _RECORD_MAGIC + self.fingerprint
+
+    def _packValues(self, values):
+        # struct would silently convert (1.7 to 1, 5 to True) what isn't of the member type
+        for i, mti, check in self._checks:
+            val = values[i]
+            if val is not None and not check(val):
+                raise TypeError("Member %s of %s is not of type %s (found %s of type %s)"
+                                % (mti.name, self.cls.__name__, mti.type, val, type(val)))
+        bitmap = bytearray(self._bitmapSize)
+        fixed = list(self._zeros)
+        for j, (i, kind) in enumerate(self._fixed):
+            val = values[i]
+            if val is None:
+                bitmap[i >> 3] |= 1 << (i & 7)
+            else:
+                fixed[j] = val
+        try:
+            parts = [None, self._struct.pack(*fixed)] # the bitmap is filled in last
+        except struct.error, e:
+            raise ValueError("%s can't be packed: %s" % (self.cls.__name__, e))
+        for i, kind, packer in self._variable:
+            val = values[i]
+            if val is None:
+                bitmap[i >> 3] |= 1 << (i & 7)
+                continue
+            if kind == "unicode":
+                val = val.encode("utf-8")
+            elif kind == "nested":
+                val = packer._packValues(val if isinstance(val, tuple) else packer._values(val))
+            parts.append(_LENGTH.pack(len(val)))
+            parts.append(val)
+        parts[0] = bytes(bitmap)
+        return b"".join(parts)
+
+    def _unpackValues(self, data, offset):
+        """ returns the member values of the record at offset and the offset after it """
+        bitmap = bytearray(data[offset:offset + self._bitmapSize])
+        offset += self._bitmapSize
+        fixed = self._struct.unpack_from(data, offset)
+        offset += self._struct.size
+        values = [None] * self._count
+        for j, (i, kind) in enumerate(self._fixed):
+            if not bitmap[i >> 3] & (1 << (i & 7)):
+                values[i] = fixed[j]
+        for i, kind, packer in self._variable:
+            if bitmap[i >> 3] & (1 << (i & 7)):
+                continue
+            size = _LENGTH.unpack_from(data, offset)[0]
+            offset += _LENGTH.size
+            if kind == "nested":
+                values[i] = packer._unpackValues(data, offset)[0]
+            else:
+                val = data[offset:offset + size]
+                values[i] = val.decode("utf-8") if kind == "unicode" else bytes(val)
+            offset += size
+        return tuple(values), offset
+
+    def _values(self, obj):
+        """ the member values of obj, which must be exactly of the packed class: the record has no room for
+            the members of subclasses
+        """
+        if type(obj) is not self.cls:
+            raise TypeError("RecordPacker of %s can't pack a %s" % (self.cls.__name__, type(obj).__name__))
+        return _resolveSchema(self.cls).toTuple(obj)
+
+    def _checkHeader(self, data, offset=0):
+        if data[offset:offset + len(self.header)] != self.header:
+            raise ValueError("data was not packed with the schema of %s" % self.cls.__name__)
+        return offset + len(self.header)
+
+    def pack(self, obj):
+        """ returns the header and the record of obj as bytes """
+        return self.header + self._packValues(self._values(obj))
+
+    def unpack(self, data, validate=False):
+        """ decodes bytes created by pack (see fromTuple for validate) """
+        values, offset = self._unpackValues(data, self._checkHeader(data))
+        return self.cls.fromTuple(values, validate)
+
+    def packMany(self, objects):
+        """ returns the header followed by the length prefixed records of all objects """
+        parts = [self.header]
+        for obj in objects:
+            record = self._packValues(self._values(obj))
+            parts.append(_LENGTH.pack(len(record)))
+            parts.append(record)
+        return b"".join(parts)
+
+    def unpackMany(self, data, validate=False):
+        """ decodes bytes created by packMany into a list of objects """
+        offset = self._checkHeader(data)
+        ret = []
+        fromTuple = self.cls.fromTuple
+        while offset < len(data):
+            values, offset = self._unpackValues(data, offset + _LENGTH.size)
+            ret.append(fromTuple(values, validate))
+        return ret
+
+    def dump(self, objects, fileobj):
+        """ writes the header and the length prefixed records of objects to a (binary) file object """
+        fileobj.write(self.header)
+        for obj in objects:
+            record = self._packValues(self._values(obj))
+            fileobj.write(_LENGTH.pack(len(record)))
+            fileobj.write(record)
+
+    def load(self, fileobj, validate=False):
+        """ generator decoding the objects written by dump, reading one record at a time """
+        header = fileobj.read(len(self.header))
+        self._checkHeader(header)
+        while True:
+            prefix = fileobj.read(_LENGTH.size)
+            if not prefix:
+                return
+            size = _LENGTH.unpack(prefix)[0]
+            record = fileobj.read(size)
+            if len(record) != size:
+                raise ValueError("truncated record in %s stream" % self.cls.__name__)
+            yield self.cls.fromTuple(self._unpackValues(record, 0)[0], validate)
+
+
+_FILE_MAGIC = b"TIF1"
+_BYTE = struct.Struct("B")
+
+class _FixedLayout(object):
+    """ fixed size binary layout of the members of a class: a null bitmap followed by every member (see
+        _fixedKind) at a fixed offset. Strings are NUL padded (utf-8 encoded for unicode, 4 bytes per
+        character of width), so trailing NUL characters are not preserved.
+    """
+
+    def __init__(self, cls):
+        self.cls = cls
+        schema = _resolveSchema(cls)
+        self.bitmapSize = (len(schema.memberList) + 7) // 8
+        self.fields = {}    # name -> (bit, offset, struct, kind, mti)
+        offset = self.bitmapSize
+        layout = []
+        for bit, mti in enumerate(schema.memberList):
+            kind, width = _fixedKind(mti)
+            if kind == "str":
+                fmt = "<%ds" % width
+            elif kind == "unicode":
+                fmt = "<%ds" % (4 * width)
+            else:
+                fmt = "<" + _FIXED_CODES[kind]
+            field = struct.Struct(fmt)
+            self.fields[mti.name] = (bit, offset, field, kind, mti)
+            offset += field.size
+            layout.append((mti.name, kind, width))
+        self.names = schema.names
+        self.size = offset
+        self.fingerprint = hashlib.md5(repr((cls.__module__, cls.__name__, layout))).digest()[:8]
+        self.header = _FILE_MAGIC + self.fingerprint + _LENGTH.pack(self.size)
+
+    def read(self, buf, base, name):
+        bit, offset, field, kind, mti = self.fields[name]
+        if _BYTE.unpack_from(buf, base + (bit >> 3))[0] & (1 << (bit & 7)):
+            return None
+        val = field.unpack_from(buf, base + offset)[0]
+        if kind == "str":
+            return val.rstrip(b"\0")
+        if kind == "unicode":
+            return val.rstrip(b"\0").decode("utf-8")
+        return val
+
+    def write(self, buf, base, name, val):
+        bit, offset, field, kind, mti = self.fields[name]
+        flags = _BYTE.unpack_from(buf, base + (bit >> 3))[0]
+        if val is None:
+            if not mti.nullable:
+                raise TypeError("Member %s of %s may not be null" % (name, self.cls.__name__))
+            _BYTE.pack_into(buf, base + (bit >> 3), flags | (1 << (bit & 7)))
+            field.pack_into(buf, base + offset, *field.unpack(b"\0" * field.size))
+            return
+        if not _memberCheck(mti)(val):
+            raise TypeError("Member %s of %s is not of type %s (found %s of type %s)"
+                            % (name, self.cls.__name__, mti.type, val, type(val)))
+        # width counts characters, a unicode field has room for 4 utf-8 bytes per character
+        if kind in ("str", "unicode") and len(val) > mti.width:
+            raise ValueError("Member %s of %s is longer than %d" % (name, self.cls.__name__, mti.width))
+        if kind == "unicode":
+            val = val.encode("utf-8")
+        try:
+            field.pack_into(buf, base + offset, val)
+        except struct.error, e:
+            raise ValueError("Member %s of %s can't be stored: %s" % (name, self.cls.__name__, e))
+        _BYTE.pack_into(buf, base + (bit >> 3), flags & ~(1 << (bit & 7)))
+
+    def pack(self, obj):
+        buf = bytearray(self.size)
+        for name in self.names:
+            self.write(buf, 0, name, getattr(obj, name))
+        return bytes(buf)
+
+
+class _RecordProxy(TypedObjectBase):
+    """ base of the record objects of a RecordFileView """
+    __slots__ = ("_view", "_base")
+
+    def __init__(self, view, base):
+        self._view = view
+        self._base = base
+
+    def toObject(self):
+        """ returns a new instance of the view class holding the values of this record """
+        return self._view.cls.fromTuple(tuple(getattr(self, name) for name in self._view.layout.names))
+
+    def __repr__(self):
+        return (self._view.cls.__name__ + "Record("
+                + ", ".join("%r=%r" % (name, getattr(self, name)) for name in self._view.layout.names) + ")")
+
+def _recordProperty(name):
+    def get(self):
+        view = self._view
+        return view.layout.read(view._buf, self._base, name)
+    def set(self, val):
+        view = self._view
+        if not view.writable:
+            raise AttributeError("%s is opened read only" % view.path)
+        view.layout.write(view._buf, self._base, name, val)
+    return property(get, set)
+
+def _recordProxyClass(schema):
+    """ the record proxy class for RecordFileViews of the class of schema, typed like it """
+    if "recordProxyClass" not in schema.__dict__:
+        ti = TypeInfo()
+        ti._memberInfo = dict(schema.members)
+        attrs = {"__slots__": (), "__typeinfo__": ti}
+        for name in schema.members:
+            attrs[name] = _recordProperty(name)
+        schema.recordProxyClass = type(schema.cls.__name__ + "Record", (_RecordProxy,), attrs)
+    return schema.recordProxyClass
+
+
+class RecordFileView(object):
+    """ a memory mapped, zero copy view over a file of fixed size records of a typed class (members must
+        be int/long, float, bool or StringType with a width, see _FixedLayout).
+
+        view[i] and iteration return record proxies: typed objects whose members are decoded from the
+        mapped file when they are read (and, for writable views, encoded into it when they are set).
+        Use RecordFileView.write to create the files.
+    """
+
+    def __init__(self, path, cls, writable=False):
+        self.path = path
+        self.cls = cls
+        self.writable = writable
+        self.layout = _FixedLayout(cls)
+        self._file = open(path, "r+b" if writable else "rb")
+        try:
+            self._buf = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+        except:
+            self._file.close()
+            raise
+        headerSize = len(self.layout.header)
+        if self._buf[:headerSize] != self.layout.header:
+            self.close()
+            raise ValueError("%s was not written with the schema of %s" % (path, cls.__name__))
+        self._start = headerSize
+        self._len = (len(self._buf) - headerSize) // self.layout.size
+        self._proxyClass = _recordProxyClass(_resolveSchema(cls))
+
+    @staticmethod
+    def write(path, cls, objects):
+        """ writes objects into a new record file for cls at path """
+        layout = _FixedLayout(cls)
+        with open(path, "wb") as f:
+            f.write(layout.header)
+            for obj in objects:
+                f.write(layout.pack(obj))
+
+    def __len__(self):
+        return self._len
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("RecordFileView index out of range")
+        return self._proxyClass(self, self._start + index * self.layout.size)
+
+    def __iter__(self):
+        proxyClass, size = self._proxyClass, self.layout.size
+        for i in xrange(self._len):
+            yield proxyClass(self, self._start + i * size)
+
+    def values(self, name):
+        """ generator over the values of a single member of all records, without creating proxies """
+        read, buf, size = self.layout.read, self._buf, self.layout.size
+        for i in xrange(self._len):
+            yield read(buf, self._start + i * size, name)
+
+    def flush(self):
+        self._buf.flush()
+
+    def close(self):
+        self._buf.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+IngestError = collections.namedtuple("IngestError", "index row error")
+
+_TRUE_STRINGS = frozenset(["1", "true", "t", "yes", "y", "on"])
+_FALSE_STRINGS = frozenset(["0", "false", "f", "no", "n", "off"])
+
+def _parseBool(val):
+    lowered = val.strip().lower()
+    if lowered in _TRUE_STRINGS:
+        return True
+    if lowered in _FALSE_STRINGS:
+        return False
+    raise ValueError("invalid literal for bool: %r" % (val,))
+
+def _memberCoercer(mti):
+    """ returns a function converting raw (text) values to the type of mti, values that are None or already
+        of the type are returned as is. Unconvertible values raise ValueError.
+    """
+    types = _typeTuple(mti.type)
+    nested = _nestedClass(mti)
+    textual = str in types or unicode in types or basestring in types
+
+    def coerce(val):
+        if val is None or isinstance(val, types):
+            return val
+        if nested is not None and isinstance(val, dict):
+            return _rowCoercer(_resolveSchema(nested))(val)
+        if isinstance(val, basestring):
+            if not textual and not val.strip():
+                return None
+            for t in types:
+                if t is bool:
+                    return _parseBool(val)
+                if t in (int, long, float):
+                    return t(val)
+                if t is str:
+                    return val.encode("utf-8")
+                if t is unicode:
+                    return val.decode("utf-8")
+        elif float in types and isinstance(val, (int, long)) and not isinstance(val, bool):
+            return float(val)
+        raise ValueError("can't convert %r to %s" % (val, mti.type))
+    return coerce
+
+def _rowCoercer(schema):
+    """ returns a function converting the values of a row dict to the member types of schema """
+    if "rowCoercer" not in schema.__dict__:
+        coercers = [(mti.name, _memberCoercer(mti)) for mti in schema.memberList]
+        def coerce(row):
+            ret = row
+            for name, coerceMember in coercers:
+                val = row.get(name, _MISSING)
+                if val is _MISSING:
+                    continue
+                try:
+                    converted = coerceMember(val)
+                except ValueError, e:
+                    raise ValueError("Member %s of %s: %s" % (name, schema.cls.__name__, e))
+                if converted is not val:
+                    if ret is row:
+                        ret = dict(row) # copy only when something changes, rows belong to the caller
+                    ret[name] = converted
+            return ret
+        schema.rowCoercer = coerce
+    return schema.rowCoercer
+
+def _ingest(cls, rows, parse, chunk_size, errors, skip=None):
+    schema = _resolveSchema(cls)
+    coerce = _rowCoercer(schema)
+    fromDict = schema.fromDict
+    chunk = []
+    for index, row in enumerate(rows):
+        if skip is not None and skip(row):
+            continue # still counted, error indices are positions in the input
+        try:
+            obj = fromDict(coerce(parse(row) if parse is not None else row), True)
+        except Exception, e:
+            if errors is not None:
+                errors(IngestError(index, row, e))
+            continue
+        if chunk_size is None:
+            yield obj
+            continue
+        chunk.append(obj)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def stream(cls, rows, chunk_size=None, errors=None):
+    """ generator turning an iterable of row dicts into validated instances of cls, in one pass and constant
+        memory. Values are converted to the member types where needed (text to int/long/float/bool,
+        str/unicode via utf-8, int to float, empty text to None) and the objects are created with
+        cls.fromDict(row, validate=True), so __init__ isn't called.
+
+        Rows that can't be converted or fail validation are skipped and, if given, passed to errors as an
+        IngestError(index, row, error). With chunk_size, lists of up to chunk_size objects are yielded
+        instead of single objects.
+    """
+    return _ingest(cls, rows, None, chunk_size, errors)
+
+def read_jsonl(cls, fileobj, chunk_size=None, errors=None):
+    """ stream() over a file of JSON lines (blank lines are skipped, malformed lines go to errors). Error
+        indices are (0 based) line numbers.
+    """
+    return _ingest(cls, fileobj, json.loads, chunk_size, errors, lambda line: not line.strip())
+
+def read_csv(cls, fileobj, chunk_size=None, errors=None, **csvOptions):
+    """ stream() over a csv file with a header line naming the members. csvOptions go to csv.DictReader """
+    return _ingest(cls, csv.DictReader(fileobj, **csvOptions), None, chunk_size, errors)
+
+
+PARALLEL_THRESHOLD = 50000
+
+# stands in for a typed object in the rows shipped to worker processes: checking a member only needs its class
+_TypeRef = collections.namedtuple("_TypeRef", "cls")
+# stands in for a missing member in those rows (_MISSING would lose its identity when pickled)
+_MissingRef = collections.namedtuple("_MissingRef", "")
+
+def _importClass(name):
+    module, _, attr = name.rpartition(".")
+    return getattr(importlib.import_module(module), attr)
+
+def _workerClassName(cls):
+    """ the name worker processes import cls by. Raises ValueError if cls can't be found by it. """
+    name = "%s.%s" % (cls.__module__, cls.__name__)
+    try:
+        imported = _importClass(name)
+    except (ImportError, AttributeError):
+        imported = None
+    if imported is not cls:
+        raise ValueError("%s must be importable as %s to be used in worker processes" % (cls, name))
+    return name
+
+def _refCheck(mti):
+    check = _memberCheck(mti)
+    types = _typeTuple(mti.type)
+    def refCheck(val):
+        if type(val) is _TypeRef:
+            return issubclass(val.cls, types)
+        if type(val) is _MissingRef:
+            return False
+        return check(val)
+    return refCheck
+
+def _validateRows(className, indices, rows):
+    """ worker side of validate_parallel: validates the member value rows of objects of a class """
+    failures = []
+    for position, mti in enumerate(_resolveSchema(_importClass(className)).memberList):
+        values = [row[position] for row in rows]
+        failures.extend((indices[i], mti.name) for i in _failingPositions(mti, values, _refCheck(mti)))
+    return failures
+
+def _decodeRows(className, start, rows, validate):
+    """ worker side of decode_parallel: returns the toTuple rows of the decoded objects and the errors """
+    fromDict = _resolveSchema(_importClass(className)).fromDict
+    decoded = []
+    errors = []
+    for i, row in enumerate(rows):
+        try:
+            obj = fromDict(row, validate)
+        except Exception, e:
+            errors.append((start + i, "%s: %s" % (type(e).__name__, e)))
+            continue
+        decoded.append((start + i, _resolveSchema(type(obj)).toTuple(obj)))
+    return decoded, errors
+
+def _runChunks(func, jobs, workers, executor):
+    """ runs func(*job) for every job, in a process pool unless jobs is a single job. Results are in job order. """
+    if len(jobs) <= 1:
+        return [func(*job) for job in jobs]
+    ownExecutor = executor is None
+    if ownExecutor:
+        try:
+            from concurrent.futures import ProcessPoolExecutor
+        except ImportError:
+            raise ImportError("parallel validation requires concurrent.futures (the futures backport on python 2)")
+        executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = [executor.submit(func, *job) for job in jobs]
+        return [f.result() for f in futures]
+    finally:
+        if ownExecutor:
+            executor.shutdown()
+
+def validate_parallel(objects, workers=None, chunk_size=10000, threshold=None, executor=None):
+    """ validate_many (without throw) spread over a process pool. The member values of the objects are sent
+        to the workers as plain tuples (typed objects in members as their class only), the workers import the
+        classes by module and name. Batches smaller than threshold (PARALLEL_THRESHOLD by default) are
+        validated in process. An executor can be passed in to reuse a pool.
+    """
+    objects = objects if isinstance(objects, (list, tuple)) else list(objects)
+    if len(objects) < (PARALLEL_THRESHOLD if threshold is None else threshold):
+        return validate_many(objects)
+
+    groups = {}
+    for i, obj in enumerate(objects):
+        if isinstance(obj, TypedObjectBase):
+            groups.setdefault(type(obj), []).append(i)
+
+    jobs = []
+    for cls, indices in groups.iteritems():
+        className = _workerClassName(cls)
+        getters = [operator.attrgetter(mti.name) for mti in _resolveSchema(cls).memberList]
+        for start in xrange(0, len(indices), chunk_size):
+            chunk = indices[start:start + chunk_size]
+            rows = []
+            for i in chunk:
+                row = []
+                for get in getters:
+                    try:
+                        val = get(objects[i])
+                    except AttributeError:
+                        val = _MissingRef()
+                    row.append(_TypeRef(type(val)) if isinstance(val, TypedObjectBase) else val)
+                rows.append(tuple(row))
+            jobs.append((className, chunk, rows))
+
+    failures = []
+    for result in _runChunks(_validateRows, jobs, workers, executor):
+        failures.extend(result)
+    failures.sort()
+    return failures
+
+def decode_parallel(cls, rows, validate=True, workers=None, chunk_size=10000, threshold=None, executor=None):
+    """ decodes row dicts with cls.fromDict(row, validate) spread over a process pool (see validate_parallel
+        for workers, threshold and executor). The decoded objects come back from the workers as toTuple rows.
+
+        returns (objects, errors): the objects of the rows that decoded, in row order, and an IngestError
+        (index, row, error message) for each row that didn't.
+    """
+    rows = rows if isinstance(rows, (list, tuple)) else list(rows)
+    objects = []
+    errors = []
+    if len(rows) < (PARALLEL_THRESHOLD if threshold is None else threshold):
+        fromDict = _resolveSchema(cls).fromDict
+        for i, row in enumerate(rows):
+            try:
+                objects.append(fromDict(row, validate))
+            except Exception, e:
+                errors.append(IngestError(i, row, "%s: %s" % (type(e).__name__, e)))
+        return objects, errors
+
+    className = _workerClassName(cls)
+    jobs = [(className, start, rows[start:start + chunk_size], validate)
+            for start in xrange(0, len(rows), chunk_size)]
+    fromTuple = _resolveSchema(cls).fromTuple
+    for decoded, failed in _runChunks(_decodeRows, jobs, workers, executor):
+        objects.extend(fromTuple(values) for _, values in decoded)
+        errors.extend(IngestError(index, rows[index], message) for index, message in failed)
+    return objects, errors
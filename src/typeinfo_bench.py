@@ -0,0 +1,138 @@
+"""
+    benchmarks of the TypedObjectBase hot paths, over shallow/deep class hierarchies and small/wide schemas.
+    Runs offline, from a single entry point:
+
+        python typeinfo_bench.py [--number N] [--repeat R] [--filter TEXT] [--output FILE] [--compare FILE]
+
+    Results are written as json (to stdout or FILE): one entry per benchmark and shape with the best time per
+    call. --compare prints the ratio to the results in an earlier output file, to spot regressions between
+    versions.
+"""
+
+import copy
+import json
+import optparse
+import platform
+import sys
+import timeit
+
+import typeinfo
+from typeinfo import MemberTypeInfo, TypedObject, TypedObjectMetaClass
+
+__author__ = 'boaz'
+
+# (name, number of members, depth of the class hierarchy)
+SHAPES = [
+    ("small-shallow", 4, 1),
+    ("small-deep", 4, 4),
+    ("wide-shallow", 48, 1),
+    ("wide-deep", 48, 8),
+]
+
+
+def _member(i):
+    kind = i % 4
+    if kind == 0:
+        return int
+    if kind == 1:
+        return MemberTypeInfo(type=str, default="a")
+    if kind == 2:
+        return MemberTypeInfo(type=list, default=[])
+    return MemberTypeInfo(type=float, nullable=False, default=0.0)
+
+
+def makeClass(width, depth, name="Bench", attrs=None):
+    """ creates a hierarchy of depth TypedObject classes declaring width members between them, returns the leaf """
+    cls = TypedObject
+    perLevel = max(width // depth, 1)
+    for level in range(depth):
+        members = dict(("m%d" % i, _member(i)) for i in range(level * perLevel, min((level + 1) * perLevel, width)))
+        if level == depth - 1:
+            members.update(("m%d" % i, _member(i)) for i in range((level + 1) * perLevel, width))
+            members.update(attrs or {})
+        cls = TypedObjectMetaClass("%s%d" % (name, level), (cls,), members)
+    return cls
+
+
+def _debugClass(width, depth):
+    old = typeinfo.DEBUG_MODE
+    typeinfo.DEBUG_MODE = True
+    try:
+        return makeClass(width, depth, "Debug", {"method": lambda self, other=None: self})
+    finally:
+        typeinfo.DEBUG_MODE = old
+
+
+def benchmarks(width, depth):
+    """ the (name, callable) pairs measured for a shape """
+    cls = makeClass(width, depth)
+    base = cls.__mro__[1]
+    obj = cls()
+    invalid = cls()
+    setattr(invalid, "m%d" % (width - 1), "not valid")
+    debugObj = _debugClass(width, depth)()
+
+    return [
+        ("class_creation", lambda: TypedObjectMetaClass("Leaf", (base,), {"extra": int})),
+        ("init", lambda: cls()),
+        ("init_kwargs", lambda: cls(m0=1, m1="b")),
+        ("initMembers", obj.initMembers),
+        ("setToDefaults", obj.setToDefaults),
+        ("listTypes", obj.listTypes),
+        ("validate_valid", obj.validateMemberTypes),
+        ("validate_invalid", lambda: invalid.validateMemberTypes(throw=False)),
+        ("repr", lambda: repr(obj)),
+        ("deepcopy", lambda: copy.deepcopy(obj)),
+        ("debug_method", lambda: debugObj.method(debugObj)),
+    ]
+
+
+def run(number=2000, repeat=5, filter=None):
+    """ runs the benchmarks and returns the results as a json serializable dict """
+    results = []
+    for shape, width, depth in SHAPES:
+        for name, func in benchmarks(width, depth):
+            if filter and filter not in name and filter not in shape:
+                continue
+            best = min(timeit.Timer(func).repeat(repeat, number)) / number
+            results.append({"benchmark": name, "shape": shape, "width": width, "depth": depth,
+                            "seconds_per_call": best, "number": number, "repeat": repeat})
+    return {"python": sys.version.split()[0], "implementation": platform.python_implementation(),
+            "platform": platform.platform(), "results": results}
+
+
+def compare(old, new):
+    """ lines with the new/old time ratio of every benchmark present in both result dicts """
+    key = lambda r: (r["benchmark"], r["shape"])
+    before = dict((key(r), r["seconds_per_call"]) for r in old["results"])
+    lines = []
+    for r in new["results"]:
+        if key(r) in before:
+            lines.append("%-18s %-14s %8.2fx" % (r["benchmark"], r["shape"], r["seconds_per_call"] / before[key(r)]))
+    return lines
+
+
+def main(argv=None):
+    parser = optparse.OptionParser(usage="%prog [options]")
+    parser.add_option("--number", type="int", default=2000, help="calls per timing")
+    parser.add_option("--repeat", type="int", default=5, help="timings per benchmark, the best one is kept")
+    parser.add_option("--filter", help="only run benchmarks or shapes containing this text")
+    parser.add_option("--output", help="write the json results to this file instead of stdout")
+    parser.add_option("--compare", help="json results of an earlier run to compare with")
+    options, _ = parser.parse_args(argv)
+
+    results = run(options.number, options.repeat, options.filter)
+    if options.output:
+        with open(options.output, "w") as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+    else:
+        json.dump(results, sys.stdout, indent=1, sort_keys=True)
+        sys.stdout.write("\n")
+    if options.compare:
+        with open(options.compare) as f:
+            for line in compare(json.load(f), results):
+                sys.stderr.write(line + "\n")
+
+
+if __name__ == '__main__':
+    main()
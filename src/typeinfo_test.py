@@ -4,7 +4,32 @@ import typeinfo as TypeInfoModule
 
 __author__ = 'boaz'
 
+import abc
+import collections
+import json
+import os
+import sys
+import tempfile
 import unittest
+from StringIO import StringIO
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import concurrent.futures as futures
+except ImportError:
+    futures = None
+
+
+class ParallelRec(TypedObject):
+    # module level so worker processes can import it
+    id = MemberTypeInfo(type=int, nullable=False, default=0)
+    name = str
+    child = TypedObject
+    anything = object
 
 
 class MyTestCase(unittest.TestCase):
@@ -262,5 +287,989 @@ class MyTestCase(unittest.TestCase):
         b.setToDefaults()
         self.assertEqual(b.i, [])
 
+    def test_schema_cached(self):
+        class A(TypedObjectBase):
+            __typeinfo__ = TypeInfo(i = int)
+
+        class B(A):
+            __typeinfo__ = TypeInfo(j = str)
+
+        self.assertTrue(TypedObjectBase._getSchema(B) is TypedObjectBase._getSchema(B()))
+        self.assertEqual(B.listTypes(), [("i", int), ("j", str)])
+
+        A.__typeinfo__ = TypeInfo(k = int)
+        self.assertEqual(B.listTypes(), [("j", str), ("k", int)])
+
+        B.__typeinfo__ = TypeInfo(j = int)
+        self.assertEqual(B.listTypes(), [("j", int), ("k", int)])
+
+        del B.__typeinfo__
+        self.assertEqual(B.listTypes(), [("k", int)])
+
+    def test_compiled_validator(self):
+        class A(TypedObject):
+            __typeinfo_compile__ = True
+            i = int
+            j = MemberTypeInfo(type=(str, unicode), nullable=False, default="a")
+            k = TypeInfoModule.IntegerType()
+
+        class B(TypedObjectBase):
+            __typeinfo__ = TypeInfo(i = int, j = MemberTypeInfo(type=(str, unicode), nullable=False, default="a"))
+
+        self.assertTrue(TypedObjectBase._getSchema(A).validator is not None)
+        self.assertTrue(TypedObjectBase._getSchema(B).validator is None)
+        B.compile()
+        self.assertTrue(TypedObjectBase._getSchema(B).validator is not None)
+
+        a = A(i=1, k=2L)
+        self.assertTrue(a.validateMemberTypes())
+        a.k = None
+        self.assertTrue(a.validateMemberTypes())
+        a.i = "x"
+        self.assertFalse(a.validateMemberTypes(throw=False))
+        self.assertRaises(TypeError, a.validateMemberTypes)
+        a.i = None
+        a.j = None
+        self.assertRaises(TypeError, a.validateMemberTypes, throw=False)
+
+        b = B()
+        b.i = "x"
+        b.j = "a"
+        try:
+            b.validateMemberTypes()
+            raise AssertionError("compiled validator didn't raise")
+        except TypeError, e:
+            self.assertEqual(str(e), "Member i of %s is not of type %s (found x of type %s)" % (b, int, str))
+
+    def test_generated_constructor(self):
+        shared = (1, "a")
+        class A(TypedObject):
+            i = int
+            t = MemberTypeInfo(type=tuple, default=shared)
+            l = MemberTypeInfo(type=list, default=[1, 2])
+            n = MemberTypeInfo(type=tuple, default=([],))
+            d = MemberTypeInfo(type=dict, nullable=False)
+
+            def method(self):
+                pass
+
+        a = A(i=3, method=None)
+        b = A()
+        self.assertEqual(a.i, 3)
+        self.assertEqual(b.i, None)
+        self.assertTrue(a.t is shared)
+        self.assertEqual(a.l, [1, 2])
+        self.assertFalse(a.l is b.l)
+        self.assertFalse(a.n[0] is b.n[0])
+        self.assertEqual(a.d, {})
+        self.assertFalse(a.d is b.d)
+        self.assertRaises(Exception, A, x=1)
+
+    def test_slots(self):
+        class Plain(TypedObject):
+            i = int
+            j = MemberTypeInfo(type=str, default="a")
+            k = float
+
+        class A(TypedObject):
+            __typeinfo_slots__ = True
+            i = int
+            j = MemberTypeInfo(type=str, default="a")
+
+        class B(A):
+            __typeinfo__ = TypeInfo(k = float)
+
+        class C(B):
+            j = MemberTypeInfo(type=str, default="b")
+
+        self.assertEqual(A.__slots__, ("i", "j"))
+        self.assertEqual(B.__slots__, ("k",))
+        self.assertEqual(C.__slots__, ())
+
+        c = C(i=1, k=2.0)
+        self.assertFalse(hasattr(c, "__dict__"))
+        self.assertEqual((c.i, c.j, c.k), (1, "b", 2.0))
+        self.assertTrue(c.validateMemberTypes())
+        self.assertRaises(AttributeError, setattr, c, "x", 1)
+
+        p = Plain(i=1, k=2.0)
+        plain_size = sys.getsizeof(p) + sys.getsizeof(p.__dict__)
+        self.assertTrue(sys.getsizeof(c) * 2 < plain_size, (sys.getsizeof(c), plain_size))
+
+    def test_enforce(self):
+        class A(TypedObject):
+            __typeinfo_enforce__ = True
+            __typeinfo_compile__ = True
+            i = int
+            s = MemberTypeInfo(type=str, nullable=False, none_on_init=True)
+
+        class B(A):
+            __typeinfo_slots__ = True
+            j = MemberTypeInfo(type=list, nullable=False)
+
+        a = A(i=1)
+        self.assertEqual(a.s, None)
+        self.assertRaises(TypeError, setattr, a, "i", "x")
+        self.assertRaises(TypeError, setattr, a, "s", None)
+        self.assertRaises(TypeError, A, i=1.0)
+        a.s = "x"
+        a.i = None
+        self.assertEqual((a.i, a.s), (None, "x"))
+        self.assertTrue(a.validateMemberTypes())
+        self.assertFalse(TypedObjectBase._getSchema(A).assignmentChecked)
+
+        b = B(i=2, s="y")
+        self.assertEqual(B.__slots__, ("_typeinfo_i", "_typeinfo_j", "_typeinfo_s"))
+        self.assertEqual((b.i, b.s, b.j), (2, "y", []))
+        self.assertRaises(TypeError, setattr, b, "j", ())
+        self.assertRaises(TypeError, setattr, b, "j", None)
+        del b.j
+        self.assertRaises(AttributeError, getattr, b, "j")
+
+        TypeInfoModule.DEBUG_MODE = True
+        try:
+            class C(TypedObject):
+                __typeinfo_enforce__ = True
+                i = int
+
+                def f(self):
+                    return self.i
+        finally:
+            TypeInfoModule.DEBUG_MODE = False
+        self.assertTrue(TypedObjectBase._getSchema(C).assignmentChecked)
+        self.assertEqual(C(i=3).f(), 3)
+
+    def test_incremental_validation(self):
+        class A(TypedObject):
+            __typeinfo_incremental__ = True
+            i = int
+            j = MemberTypeInfo(type=str, default="a")
+
+        class B(A):
+            __typeinfo_slots__ = True
+            k = float
+
+        for cls in (A, B):
+            a = cls(i=1)
+            self.assertEqual(a.getDirtyMembers(), frozenset(TypedObjectBase._getSchema(cls).members))
+            self.assertTrue(a.validateMemberTypes())
+            self.assertEqual(a.getDirtyMembers(), frozenset())
+
+            a.j = 1
+            self.assertEqual(a.getDirtyMembers(), frozenset(["j"]))
+            self.assertFalse(a.validateMemberTypes(throw=False))
+            self.assertEqual(a.getDirtyMembers(), frozenset(["j"]))
+            a.j = "b"
+            self.assertTrue(a.validateMemberTypes())
+
+        # changes behind the tracking's back are only found by a forced validation
+        a = A()
+        a.validateMemberTypes()
+        a.__dict__["i"] = "x"
+        self.assertTrue(a.validateMemberTypes())
+        self.assertFalse(a.validateMemberTypes(throw=False, force=True))
+
+        self.assertTrue("__typeinfo_dirty__" in B.__slots__)
+
+        # members without a tracking descriptor: always fully validated
+        class C(TypedObjectBase):
+            __typeinfo_incremental__ = True
+            __typeinfo__ = TypeInfo(i = int)
+        c = C()
+        c.i = 1
+        self.assertTrue(c.validateMemberTypes())
+        c.i = "x"
+        self.assertFalse(c.validateMemberTypes(throw=False))
+
+        a = A(i=1)
+        self.assertTrue(a.validateMemberTypes())
+        A.__typeinfo__ = TypeInfo(i = int, j = MemberTypeInfo(type=str, default="a"), k = int)
+        a.k = "x"
+        self.assertFalse(a.validateMemberTypes(throw=False))
+
+    def test_validate_many(self):
+        class A(TypedObject):
+            i = int
+            j = MemberTypeInfo(type=str, nullable=False, default="a")
+
+        class B(TypedObject):
+            k = float
+
+        objs = [A(i=1), B(k=1.0), A(i="x"), "not typed", B(k=1), A(j=None)]
+        del objs[0].j
+        self.assertEqual(TypeInfoModule.validate_many(objs), [(0, "j"), (2, "i"), (4, "k"), (5, "j")])
+        self.assertEqual(TypeInfoModule.validate_many(objs[1:2]), [])
+        self.assertEqual(TypeInfoModule.validate_many(iter(objs[2:])), [(0, "i"), (2, "k"), (3, "j")])
+        self.assertRaises(TypeError, TypeInfoModule.validate_many, objs[1:], throw=True)
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_typed_array(self):
+        class A(TypedObject):
+            i = TypeInfoModule.IntegerType(nullable=False, default=0)
+            f = float
+            b = bool
+            s = TypeInfoModule.StringType(width=4)
+
+        arr = TypeInfoModule.TypedArray(A, [A(i=1, f=0.5, b=True, s="ab"), A(i=2L, s="abcd")], capacity=1)
+        arr.append(A(i=3, f=1.5))
+        arr.append(A(i=None))
+        self.assertEqual(len(arr), 4)
+        self.assertEqual(arr.dtype.names, ("b", "f", "i", "s"))
+        self.assertRaises(TypeError, arr.append, A(i="x"))
+        self.assertRaises(ValueError, arr.append, A(s="abcde"))
+        self.assertEqual(len(arr), 4)
+
+        # failed appends leave nothing behind in the slot they would have used
+        fresh = TypeInfoModule.TypedArray(A)
+        self.assertRaises(TypeError, fresh.append, A(i="x"))
+        self.assertRaises(TypeError, fresh.extend, [A(), A(f="x")])
+        fresh.append(A(i=1, f=2.0, b=True))
+        fresh.extend([A(i=2, f=3.0, b=False, s="a"), A(i=3, f=4.0, b=True, s="b")])
+        self.assertEqual([(r.f, r.b) for r in fresh], [(2.0, True), (3.0, False), (4.0, True)])
+
+        row = arr[0]
+        self.assertEqual((row.i, row.f, row.b, row.s), (1, 0.5, True, "ab"))
+        self.assertEqual(arr[1].f, None)
+        self.assertEqual(row.listTypes(), A.listTypes())
+        self.assertTrue(row.validateMemberTypes())
+        self.assertEqual(arr.validate(), [(3, "i")])
+        row.f = 2.5
+        self.assertEqual(arr.column("f").sum(), 4.0)
+
+        self.assertEqual([r.i for r in arr[1:3]], [2, 3])
+        evens = arr.filter(arr.column("i") % 2 == 0)
+        self.assertEqual([r.i for r in evens], [2])
+        obj = arr[2].toObject()
+        self.assertTrue(isinstance(obj, A))
+        self.assertEqual((obj.i, obj.f, obj.b, obj.s), (3, 1.5, None, None))
+
+        class B(TypedObject):
+            l = list
+        self.assertRaises(TypeError, TypeInfoModule.TypedArray, B)
+
+    def test_codecs(self):
+        class Inner(TypedObject):
+            x = int
+            tags = MemberTypeInfo(type=list, default=[])
+
+        class Outer(TypedObject):
+            name = MemberTypeInfo(type=str, nullable=False, default="")
+            inner = Inner
+            count = TypeInfoModule.IntegerType()
+
+        o = Outer(name="a", inner=Inner(x=1, tags=["t"]), count=3)
+        d = o.toDict()
+        self.assertEqual(d, {"name": "a", "inner": {"x": 1, "tags": ["t"]}, "count": 3})
+        t = o.toTuple()
+        self.assertEqual(t, (3, (["t"], 1), "a"))
+
+        for decoded in (Outer.fromDict(d, validate=True), Outer.fromTuple(t, validate=True)):
+            self.assertTrue(isinstance(decoded.inner, Inner))
+            self.assertEqual(decoded.toDict(), d)
+
+        partial = Outer.fromDict({"name": "b"})
+        self.assertEqual((partial.name, partial.inner, partial.count), ("b", None, None))
+        self.assertRaises(Exception, Outer.fromDict, {"name": "b", "other": 1})
+        self.assertRaises(TypeError, Outer.fromDict, {"count": "x"}, validate=True)
+        self.assertRaises(TypeError, Outer.fromDict, {"name": None}, validate=True)
+        self.assertRaises(TypeError, Outer.fromDict, {"inner": {"x": "y"}}, validate=True)
+        self.assertEqual(Outer.fromDict({"count": "x"}).count, "x")
+        self.assertRaises(TypeError, Outer.fromTuple, (1, 2))
+
+    def test_record_packer(self):
+        class Point(TypedObject):
+            x = float
+            y = float
+
+        class Rec(TypedObject):
+            id = TypeInfoModule.IntegerType()
+            name = str
+            label = unicode
+            flag = bool
+            at = Point
+
+        objs = [Rec(id=1, name="a", label=u"\u00e9t\u00e9", flag=True, at=Point(x=1.0, y=2.5)),
+                Rec(id=2L ** 40, name=""),
+                Rec()]
+        packer = TypeInfoModule.RecordPacker(Rec)
+
+        data = packer.pack(objs[0])
+        self.assertEqual(packer.unpack(data, validate=True).toDict(), objs[0].toDict())
+        self.assertTrue(len(data) < len(json.dumps(objs[0].toDict())))
+
+        many = packer.unpackMany(packer.packMany(objs))
+        self.assertEqual([o.toDict() for o in many], [o.toDict() for o in objs])
+
+        f = StringIO()
+        packer.dump(objs, f)
+        f.seek(0)
+        self.assertEqual([o.toDict() for o in packer.load(f)], [o.toDict() for o in objs])
+
+        self.assertRaises(ValueError, TypeInfoModule.RecordPacker(Point).unpack, data)
+        self.assertRaises(ValueError, packer.pack, Rec(id=2L ** 70))
+
+        class Bad(TypedObject):
+            l = list
+        self.assertRaises(TypeError, TypeInfoModule.RecordPacker, Bad)
+
+    def test_record_file_view(self):
+        class Rec(TypedObject):
+            id = TypeInfoModule.IntegerType(nullable=False, default=0)
+            score = float
+            ok = bool
+            code = TypeInfoModule.StringType(width=3)
+            name = TypeInfoModule.StringType(type=unicode, width=4)
+
+        objs = [Rec(id=i, score=i / 2.0, ok=i % 2 == 0, code="c%d" % i, name=u"n\u00e9") for i in range(5)]
+        objs.append(Rec())
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            TypeInfoModule.RecordFileView.write(path, Rec, objs)
+            with TypeInfoModule.RecordFileView(path, Rec) as view:
+                self.assertEqual(len(view), 6)
+                self.assertEqual(view[2].toObject().toDict(), objs[2].toDict())
+                self.assertEqual(view[-1].score, None)
+                self.assertEqual([r.toObject().toDict() for r in view], [o.toDict() for o in objs])
+                self.assertEqual(list(view.values("id")), range(5) + [0])
+                self.assertEqual(view[0].listTypes(), Rec.listTypes())
+                self.assertTrue(view[0].validateMemberTypes())
+                self.assertRaises(AttributeError, setattr, view[0], "id", 7)
+
+            with TypeInfoModule.RecordFileView(path, Rec, writable=True) as view:
+                view[1].id = 10
+                view[1].name = None
+                self.assertRaises(TypeError, setattr, view[1], "id", None)
+                self.assertRaises(TypeError, setattr, view[1], "score", 1)
+                self.assertRaises(ValueError, setattr, view[1], "code", "long")
+                self.assertRaises(ValueError, setattr, view[1], "name", u"abcde")
+                view[0].name = u"\u00e9t\u00e9s"
+
+            with TypeInfoModule.RecordFileView(path, Rec) as view:
+                self.assertEqual((view[1].id, view[1].name, view[1].code), (10, None, "c1"))
+                self.assertEqual(view[0].name, u"\u00e9t\u00e9s")
+
+            class Other(TypedObject):
+                id = list
+            self.assertRaises(TypeError, TypeInfoModule.RecordFileView, path, Other)
+            Other.__typeinfo__ = TypeInfo(id = TypeInfoModule.IntegerType())
+            self.assertRaises(ValueError, TypeInfoModule.RecordFileView, path, Other)
+        finally:
+            os.remove(path)
+
+    def test_stream(self):
+        class Pos(TypedObject):
+            lat = float
+            lon = float
+
+        class Rec(TypedObject):
+            id = MemberTypeInfo(type=int, nullable=False, default=0)
+            name = str
+            active = bool
+            pos = Pos
+
+        errors = []
+        rows = [{"id": "1", "name": u"a", "active": "yes", "pos": {"lat": 1, "lon": "2.5"}},
+                {"id": "x"},
+                {"id": 3, "active": ""},
+                {"id": None},
+                {"id": 5, "other": 1}]
+        objs = list(TypeInfoModule.stream(Rec, rows, errors=errors.append))
+        self.assertEqual([o.toDict() for o in objs],
+                         [{"id": 1, "name": "a", "active": True, "pos": {"lat": 1.0, "lon": 2.5}},
+                          {"id": 3, "name": None, "active": None, "pos": None}])
+        self.assertEqual([e.index for e in errors], [1, 3, 4])
+        self.assertTrue(errors[0].row is rows[1])
+
+        chunks = list(TypeInfoModule.stream(Rec, ({"id": i} for i in range(5)), chunk_size=2))
+        self.assertEqual([[o.id for o in c] for c in chunks], [[0, 1], [2, 3], [4]])
+
+        jsonl = StringIO('{"id": 1, "pos": {"lat": 0.5, "lon": 1}}\n\n\nnot json\n{"id": "2"}\n')
+        errors = []
+        self.assertEqual([o.id for o in TypeInfoModule.read_jsonl(Rec, jsonl, errors=errors.append)], [1, 2])
+        self.assertEqual([e.index for e in errors], [3]) # the line number, blank lines included
+
+        data = StringIO("id,name,active\n1,a,true\n2,,0\nbad,b,1\n")
+        errors = []
+        objs = list(TypeInfoModule.read_csv(Rec, data, errors=errors.append))
+        self.assertEqual([(o.id, o.name, o.active) for o in objs], [(1, "a", True), (2, "", False)])
+        self.assertEqual([e.index for e in errors], [2])
+
+    def test_parallel(self):
+        objs = [ParallelRec(id=i, name="n%d" % i) for i in range(50)]
+        objs[3].id = None
+        objs[7].name = 1
+        objs[9].child = ParallelRec()
+        objs[11].child = "x"
+        del objs[13].anything
+        expected = [(3, "id"), (7, "name"), (11, "child"), (13, "anything")]
+        pooled = {"workers": 2, "chunk_size": 10, "threshold": 0}
+        self.assertEqual(TypeInfoModule.validate_parallel(objs), expected)
+        if futures is not None:
+            self.assertEqual(TypeInfoModule.validate_parallel(objs, **pooled), expected)
+
+        rows = [{"id": i, "name": "n%d" % i} for i in range(50)]
+        rows[5]["id"] = "x"
+        rows[6]["other"] = 1
+        for kwargs in ({}, pooled) if futures is not None else ({},):
+            objects, errors = TypeInfoModule.decode_parallel(ParallelRec, rows, **kwargs)
+            self.assertEqual([o.id for o in objects], [i for i in range(50) if i not in (5, 6)])
+            self.assertEqual([e.index for e in errors], [5, 6])
+            self.assertTrue(errors[0].row is rows[5])
+
+        class Local(TypedObject):
+            i = int
+        self.assertRaises(ValueError, TypeInfoModule.validate_parallel, [Local()] * 2, threshold=0)
+
+    def test_runtime_checking(self):
+        class A(TypedObject):
+            i = int
+
+            def f(self):
+                return self.i
+
+            def __repr__(self):
+                return "A"
+
+        a = A()
+        a.i = "x"
+        original = A.__dict__["f"]
+        self.assertEqual(a.f(), "x")
+        try:
+            TypeInfoModule.set_checking()
+            self.assertRaises(TypeError, a.f)
+            self.assertEqual(repr(a), "A")
+
+            class B(TypedObject):
+                j = int
+
+                def g(self):
+                    return self.j
+
+            b = B()
+            b.j = "y"
+            self.assertRaises(TypeError, b.g)
+
+            TypeInfoModule.set_checking(A, every=3)
+            self.assertEqual(a.f(), "x")
+            self.assertEqual(a.f(), "x")
+            self.assertRaises(TypeError, a.f)
+
+            class Clock(object):
+                now = 100.0
+                def time(self):
+                    return self.now
+            clock = Clock()
+            TypeInfoModule.time, real_time = clock, TypeInfoModule.time
+            try:
+                TypeInfoModule.set_checking(A, per_second=2)
+                self.assertRaises(TypeError, a.f)
+                self.assertRaises(TypeError, a.f)
+                self.assertEqual(a.f(), "x")
+                clock.now = 101.0
+                self.assertRaises(TypeError, a.f)
+            finally:
+                TypeInfoModule.time = real_time
+
+            TypeInfoModule.disable_checking(A)
+            self.assertEqual(a.f(), "x")
+            self.assertRaises(TypeError, b.g)
+        finally:
+            TypeInfoModule.disable_checking()
+        self.assertTrue(A.__dict__["f"] is original)
+        self.assertEqual(b.g(), "y")
+
+    def test_stats(self):
+        class A(TypedObject):
+            i = int
+            j = str
+
+        events = []
+        TypeInfoModule.enable_stats(hook=lambda event, cls, member, seconds: events.append((event, member)))
+        try:
+            a = A(i=1)
+            a.validateMemberTypes()
+            a.j = 2
+            self.assertFalse(a.validateMemberTypes(throw=False))
+            a.i = None
+            a.initMembers()
+
+            snapshot = TypeInfoModule.stats(reset=True)[A]
+            self.assertEqual((snapshot["construct"], snapshot["validate"], snapshot["initMembers"]), (1, 2, 1))
+            self.assertEqual((snapshot["failures"], snapshot["member_failures"]), (1, {"j": 1}))
+            self.assertTrue(snapshot["validate_time"] >= 0.0)
+            self.assertEqual(snapshot["member_validations"], {"i": 2, "j": 2})
+            self.assertTrue(snapshot["member_validate_time"]["j"] >= 0.0)
+            self.assertEqual(events, [("construct", None), ("validate", None), ("validate", None),
+                                      ("failure", "j"), ("initMembers", None)])
+            self.assertEqual(TypeInfoModule.stats(), {})
+        finally:
+            TypeInfoModule.disable_stats()
+        a.validateMemberTypes()
+        self.assertEqual(TypeInfoModule.stats(), {})
+
+    def test_benchmarks_run(self):
+        import typeinfo_bench
+        results = typeinfo_bench.run(number=1, repeat=1, filter="small-shallow")["results"]
+        self.assertEqual(len(results), len(typeinfo_bench.benchmarks(4, 1)))
+        self.assertEqual(typeinfo_bench.compare({"results": results}, {"results": results[:1]})[0].split()[-1], "1.00x")
+
+    def test_accept_cache(self):
+        class Base(object):
+            __metaclass__ = abc.ABCMeta
+
+        class Impl(object):
+            pass
+
+        class Odd(type):
+            def __instancecheck__(cls, instance):
+                return getattr(instance, "odd", False)
+
+        class Checked(object):
+            __metaclass__ = Odd
+
+        mti = MemberTypeInfo(name="m", type=(int, Base))
+        self.assertTrue(mti.validateValue(1))
+        self.assertFalse(mti.validateValue(Impl(), throw=False))
+        self.assertEqual(mti._acceptCache.results[Impl], False)
+
+        Base.register(Impl) # registering invalidates cached rejections
+        self.assertTrue(mti.validateValue(Impl()))
+
+        class Later(Impl):
+            pass
+        self.assertTrue(mti.validateValue(Later()))
+        self.assertEqual(len(mti._acceptCache.results), 2)
+
+        plain = MemberTypeInfo(name="p", type=(int, str))
+        self.assertTrue(plain.validateValue("x"))
+        self.assertFalse(plain.validateValue(1.0, throw=False))
+        self.assertEqual(len(plain._acceptCache.results), 0) # isinstance is cheaper than the cache
+
+        odd = MemberTypeInfo(name="o", type=Checked)
+        impl = Impl()
+        self.assertFalse(odd.validateValue(impl, throw=False))
+        impl.odd = True
+        self.assertTrue(odd.validateValue(impl))
+
+        class A(TypedObject):
+            __typeinfo_compile__ = True
+            b = Base
+        a = A(b=Impl())
+        self.assertTrue(a.validateMemberTypes())
+        a.b = 1
+        self.assertFalse(a.validateMemberTypes(throw=False))
+        self.assertEqual(TypeInfoModule.validate_many([a]), [(0, "b")])
+
+    def test_lazy_typeinfo(self):
+        class NoDefault(object):
+            def __init__(self, required):
+                pass
+
+        TypeInfoModule.LAZY_TYPEINFO = True
+        try:
+            class A(TypedObject):
+                i = int
+                j = MemberTypeInfo(type=str, default="a")
+
+            class Broken(TypedObject):
+                k = MemberTypeInfo(type=NoDefault, nullable=False)
+        finally:
+            TypeInfoModule.LAZY_TYPEINFO = False
+
+        self.assertTrue(A.__typeinfo__._members is None)
+        self.assertEqual(A(i=1).j, "a")
+        self.assertEqual(A.listTypes(), [("i", int), ("j", str)])
+        self.assertTrue(A.__typeinfo__._members is not None)
+
+        self.assertRaises(TypeError, Broken)
+        self.assertRaises(TypeError, TypeInfoModule.warmup, [A])
+        try:
+            TypeInfoModule.warmup([A, Broken])
+            raise AssertionError("warmup didn't report Broken")
+        except TypeError, e:
+            self.assertTrue("member k" in str(e) or "for k" in str(e), str(e))
+        Broken.__typeinfo__ = TypeInfo(k = int)
+        TypeInfoModule._pendingTypeInfos.clear()
+        TypeInfoModule.warmup([A, Broken])
+
+    def test_schema_cache(self):
+        class A(TypedObject):
+            i = int
+            j = MemberTypeInfo(type=list, default=[])
+
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            TypeInfoModule.save_schema_cache(path, [A])
+            self.assertTrue(TypedObjectBase._getSchema(A).validator is None)
+            TypeInfoModule._codeCache.clear()
+            self.assertTrue(TypeInfoModule.load_schema_cache(path))
+            fingerprint = TypedObjectBase._getSchema(A).fingerprint
+            self.assertTrue((fingerprint, "construct") in TypeInfoModule._codeCache)
+
+            class B(TypedObject):
+                i = int
+                j = MemberTypeInfo(type=list, default=[])
+            B.__name__ = A.__name__
+            schema = TypedObjectBase._getSchema(B)
+            self.assertEqual(schema.fingerprint, fingerprint)
+            b = B(i=1)
+            self.assertTrue(schema.generatedCode["construct"][1] is TypeInfoModule._codeCache[(fingerprint, "construct")][1])
+            self.assertEqual((b.i, b.j), (1, []))
+
+            A.__typeinfo__ = TypeInfo(i = str)
+            self.assertNotEqual(TypedObjectBase._getSchema(A).fingerprint, fingerprint)
+            self.assertEqual(A(i="x").i, "x")
+
+            with open(path, "wb") as f:
+                f.write("garbage")
+            self.assertFalse(TypeInfoModule.load_schema_cache(path))
+            self.assertFalse(TypeInfoModule.load_schema_cache(path + ".missing"))
+        finally:
+            TypeInfoModule._codeCache.clear()
+            os.remove(path)
+
+    def test_schema_ordered_view(self):
+        class A(TypedObject):
+            b = int
+            a = str
+            z = MemberTypeInfo(type=float, order=1)
+            y = MemberTypeInfo(type=list, order=2)
+
+        schema = TypedObjectBase._getSchema(A)
+        self.assertEqual(schema.names, ("z", "y", "a", "b"))
+        self.assertEqual(schema.types, (float, list, str, int))
+        self.assertEqual(schema.positions, {"z": 0, "y": 1, "a": 2, "b": 3})
+        self.assertEqual([mti.name for mti in sorted(schema.members.values())], list(schema.names))
+        self.assertEqual(A.listTypes(), list(zip(schema.names, schema.types)))
+        self.assertEqual(repr(A(b=1)), "A('z'=None, 'y'=None, 'a'=None, 'b'=1)")
+
+    def test_generated_equality(self):
+        class A(TypedObject):
+            __typeinfo_eq__ = True
+            i = int
+            s = str
+
+        class B(A):
+            pass
+
+        self.assertEqual(A(i=1, s="a"), A(i=1, s="a"))
+        self.assertNotEqual(A(i=1, s="a"), A(i=2, s="a"))
+        self.assertFalse(A(i=1) != A(i=1))
+        self.assertNotEqual(A(i=1), B(i=1))
+        self.assertNotEqual(A(i=1), 1)
+        self.assertEqual(hash(A(i=1, s="a")), hash(A(i=1, s="a")))
+        self.assertEqual(len(set([A(i=1), A(i=1), A(i=2)])), 2)
+
+    def test_frozen(self):
+        class F(TypedObject):
+            __typeinfo_frozen__ = True
+            __typeinfo_slots__ = True
+            i = int
+            t = MemberTypeInfo(type=tuple, default=())
+
+        f = F(i=1, t=(1, 2))
+        self.assertEqual((f.i, f.t), (1, (1, 2)))
+        self.assertRaises(AttributeError, setattr, f, "i", 2)
+        self.assertRaises(AttributeError, delattr, f, "i")
+        self.assertRaises(AttributeError, f.setToDefaults)
+        self.assertEqual(f.i, 1)
+        self.assertEqual(hash(f), hash(f))
+        self.assertEqual(f.__typeinfo_hash__, hash(f))
+        self.assertEqual({f: "x"}[F(i=1, t=(1, 2))], "x")
+        self.assertEqual(F.fromDict(f.toDict()), f)
+        self.assertEqual(F.fromTuple((None, (3,))).t, (3,))
+
+    def test_copy(self):
+        import copy
+
+        class Node(TypedObject):
+            name = str
+            items = MemberTypeInfo(type=list, default=[])
+            other = TypedObjectBase
+
+        a = Node(name="a", items=[[1]])
+        b = Node(name="b", other=a)
+        a.other = b
+        a.note = {"x": 1}
+
+        c = copy.copy(a)
+        self.assertTrue(type(c) is Node)
+        self.assertTrue(c.items is a.items and c.other is b and c.note is a.note)
+
+        d = copy.deepcopy(a)
+        self.assertEqual((d.name, d.items, d.note), ("a", [[1]], {"x": 1}))
+        self.assertFalse(d.items is a.items or d.items[0] is a.items[0] or d.note is a.note)
+        self.assertTrue(d.other is not b and d.other.other is d)
+
+    def test_copy_slots_and_frozen(self):
+        import copy
+
+        class S(TypedObject):
+            __typeinfo_slots__ = True
+            __slots__ = ("extra",)
+            i = int
+            l = MemberTypeInfo(type=list, default=[])
+
+        class F(TypedObject):
+            __typeinfo_frozen__ = True
+            s = S
+
+        s = S(i=1, l=[2])
+        s.extra = [3]
+        f = F(s=s)
+        g = copy.deepcopy(f)
+        self.assertEqual((g.s.i, g.s.l, g.s.extra), (1, [2], [3]))
+        self.assertFalse(g.s is s or g.s.extra is s.extra)
+        self.assertRaises(AttributeError, setattr, g, "s", None)
+        self.assertTrue(copy.copy(f).s is s)
+
+    def test_interning(self):
+        class Pair(TypedObject):
+            __typeinfo_intern__ = True
+            __typeinfo_slots__ = True
+            base = str
+            quote = str
+            lot = MemberTypeInfo(type=int, default=1)
+
+        a = Pair(base="EUR", quote="USD")
+        self.assertTrue(Pair(quote="USD", base="EUR", lot=1) is a)
+        b = Pair(base="EUR", quote="GBP")
+        c = Pair(base="EUR", quote="USD", lot=True)
+        self.assertFalse(b is a or c is a)
+        self.assertRaises(AttributeError, setattr, a, "lot", 2)
+        self.assertRaises(Exception, Pair, unknown=1)
+        self.assertEqual(TypeInfoModule.intern_stats(Pair, reset=True),
+                         {"hits": 1, "misses": 3, "size": 3, "capacity": TypeInfoModule.INTERN_CAPACITY})
+        del a
+        self.assertEqual(TypeInfoModule.intern_stats(Pair)["size"], 2)
+
+        class Small(Pair):
+            __typeinfo_intern__ = 1
+        x = Small(base="a")
+        self.assertFalse(Small(base="b") is Small(base="b"))
+        self.assertTrue(Small(base="a") is x)
+        self.assertRaises(TypeError, TypeInfoModule.intern_stats, TypedObject)
+
+        class T(TypedObject):
+            __typeinfo_intern__ = True
+            t = tuple
+            o = object
+        t = T(t=(1, (2,)))
+        self.assertTrue(T(t=(1, (2,))) is t)
+        self.assertFalse(T(t=(1.0, (2,))) is t)
+        self.assertFalse(T(t=(1, (2.0,))) is t)
+        self.assertEqual(type(T(t=(1.0,)).t[0]), float)
+        o = T(t=(1,), o=frozenset([1]))
+        self.assertFalse(T(t=(1,), o=frozenset([1])) is o)
+
+    def test_object_pool(self):
+        class R(TypedObject):
+            path = str
+            headers = MemberTypeInfo(type=dict, default={})
+
+        pool = TypeInfoModule.ObjectPool(R, capacity=1)
+        a = pool.acquire(path="/a")
+        a.headers["x"] = "1"
+        pool.release(a)
+        self.assertRaises(ValueError, pool.release, a)
+        b = pool.acquire(path="/b")
+        self.assertTrue(b is a)
+        self.assertEqual((b.path, b.headers), ("/b", {}))
+        with pool.borrow() as c:
+            self.assertFalse(c is b)
+            self.assertEqual(c.path, None)
+        pool.release(b)
+        self.assertRaises(TypeError, pool.release, object())
+        self.assertEqual(pool.stats(), {"created": 2, "reused": 1, "released": 3, "dropped": 1, "size": 1,
+                                        "capacity": 1})
+
+        b = pool.acquire()
+        b.session = "secret"
+        pool.release(b)
+        self.assertFalse(hasattr(pool.acquire(), "session"))
+
+        class S(TypedObject):
+            __typeinfo_slots__ = True
+            __slots__ = ("session",)
+            i = int
+        slotted = TypeInfoModule.ObjectPool(S)
+        s = slotted.acquire(i=1)
+        s.session = "secret"
+        slotted.release(s)
+        self.assertFalse(hasattr(slotted.acquire(), "session"))
+
+        class F(TypedObject):
+            __typeinfo_frozen__ = True
+        self.assertRaises(TypeError, TypeInfoModule.ObjectPool, F)
+
+    def test_validate_deep(self):
+        class Line(TypedObject):
+            price = MemberTypeInfo(type=float, nullable=False, default=0.0)
+
+        class Order(TypedObject):
+            lines = MemberTypeInfo(type=list, default=[])
+            parent = TypedObjectBase
+            extra = dict
+
+        root = Order()
+        shared = Line(price="free")
+        root.lines = [Line(price=1.0), shared, shared]
+        root.parent = root
+        root.extra = {"k": [Line(price=None)]}
+        self.assertEqual(TypeInfoModule.validate_deep(root),
+                         [("extra['k'][0].price", "is not nullable but is None"),
+                          ("lines[1].price", "is not of type <type 'float'> (found free of type <type 'str'>)")])
+        self.assertRaises(TypeError, TypeInfoModule.validate_deep, root, throw=True)
+        shared.price = 2.0
+        root.extra = None
+        self.assertEqual(TypeInfoModule.validate_deep(root), [])
+
+        # deep chains don't hit the recursion limit
+        head = Order()
+        for _ in range(sys.getrecursionlimit() * 2):
+            head = Order(parent=head)
+        self.assertEqual(TypeInfoModule.validate_deep(head), [])
+
+    def test_codec_nested_declared_class(self):
+        class X(TypedObject):
+            v = int
+
+        class Holder(TypedObject):
+            exact = X
+            base = TypedObject
+            either = MemberTypeInfo(type=(X, int))
+
+        h = Holder(exact=X(v=1), either=2)
+        self.assertEqual(Holder.fromDict(h.toDict(), validate=True).exact.v, 1)
+        self.assertEqual(Holder.fromTuple(h.toTuple(), validate=True).either, 2)
+        h.base = X(v=5)
+        self.assertRaises(TypeError, h.toDict)
+        self.assertRaises(TypeError, h.toTuple)
+        h.base = None
+        h.either = X(v=1)
+        self.assertRaises(TypeError, h.toDict)
+
+    def test_codec_enforced_none_on_init(self):
+        class E(TypedObject):
+            __typeinfo_enforce__ = True
+            i = int
+            s = MemberTypeInfo(type=str, nullable=False, none_on_init=True)
+
+        e = E.fromDict(E(i=1).toDict())
+        self.assertEqual((e.i, e.s), (1, None))
+        self.assertEqual(E.fromTuple(e.toTuple()).s, None)
+        self.assertEqual(E.fromDict({"i": 2}).s, None)
+        self.assertRaises(TypeError, setattr, e, "s", None)
+
+    def test_record_packer_exact_classes(self):
+        class Leaf(TypedObject):
+            v = int
+
+        class Holder(TypedObject):
+            child = TypedObject
+
+        class SubLeaf(Leaf):
+            w = int
+
+        holder = Holder(child=Leaf(v=5))
+        packer = TypeInfoModule.RecordPacker(Holder)
+        self.assertRaises(TypeError, packer.pack, holder)
+        self.assertRaises(TypeError, packer.packMany, [holder])
+        self.assertRaises(TypeError, TypeInfoModule.RecordPacker(Leaf).pack, SubLeaf(v=1, w=2))
+
+        class Typed(TypedObject):
+            i = int
+            b = bool
+            s = str
+        typed = TypeInfoModule.RecordPacker(Typed)
+        for bad in (Typed(i=1.7), Typed(b=5), Typed(s=u"\u00e9")):
+            self.assertRaises(TypeError, typed.pack, bad)
+        self.assertEqual(typed.unpack(typed.pack(Typed(i=1, b=True, s="x"))).toTuple(), (True, 1, "x"))
+        self.assertEqual(packer.unpack(packer.pack(Holder())).child, None)
+
+    def test_runtime_checking_skips_generated_methods(self):
+        class F(TypedObject):
+            __typeinfo_frozen__ = True
+            i = int
+
+        f = F(i=1)
+        object.__setattr__(f, "i", "invalid")
+        try:
+            TypeInfoModule.set_checking()
+            self.assertEqual(f, f)
+            self.assertFalse(f != f)
+            hash(f)
+            self.assertRaises(AttributeError, setattr, f, "i", 2)
+            self.assertTrue(F.__dict__["__eq__"] is TypeInfoModule._typedEq)
+        finally:
+            TypeInfoModule.disable_checking()
+
+    def test_copy_regressions(self):
+        import copy
+
+        class E(TypedObject):
+            __typeinfo_enforce__ = True
+            i = int
+            s = MemberTypeInfo(type=str, nullable=False, none_on_init=True)
+
+        e = E(i=1)
+        self.assertEqual((copy.copy(e).s, copy.deepcopy(e).i), (None, 1))
+        self.assertRaises(TypeError, setattr, copy.copy(e), "s", None)
+
+        class C(TypedObject):
+            i = int
+            j = int
+
+            def __init__(self):
+                self.i = 1
+
+        c = copy.deepcopy(C())
+        self.assertEqual(c.i, 1)
+        self.assertFalse(hasattr(c, "j"))
+
+        class P(TypedObject):
+            i = int
+
+            def __getstate__(self):
+                return {"i": 99}
+
+        class Q(P):
+            pass
+
+        self.assertEqual(copy.deepcopy(P(i=1)).i, 99)
+        self.assertEqual(copy.copy(Q(i=1)).i, 99)
+
+        d = C()
+        d.i = [1]
+        self.assertFalse(copy.deepcopy(d).i is d.i)
+
+    def test_init_from_dict_inputs(self):
+        class A(TypedObject):
+            i = int
+            j = int
+
+        a = A()
+        a.initFromDict([("i", 1)], j=2)
+        self.assertEqual((a.i, a.j), (1, 2))
+        a.initFromDict([("j", 3)])
+        self.assertEqual(a.j, 3)
+        a.initFromDict(collections.OrderedDict(i=4))
+        self.assertEqual(a.i, 4)
+        a.initFromDict({"i": 5}, i=6)
+        self.assertEqual(a.i, 5)
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_typed_array_frozen_rows(self):
+        class F(TypedObject):
+            __typeinfo_frozen__ = True
+            i = int
+            f = float
+
+        arr = TypeInfoModule.TypedArray(F, [F(i=1, f=0.5), F(i=2)])
+        self.assertEqual(arr.toObjects(), [F(i=1, f=0.5), F(i=2)])
+        self.assertRaises(AttributeError, setattr, arr[0].toObject(), "i", 3)
+
 if __name__ == '__main__':
     unittest.main()